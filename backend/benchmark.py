@@ -0,0 +1,287 @@
+"""Load benchmark for the InnoCivic API.
+
+Generates a synthetic catalog and data files for each requested size, boots the
+app in a fresh interpreter pointed at them and drives it in-process through an
+ASGI client under concurrent load. Reports throughput and p50/p99 latency per
+scenario so runs can be compared against a saved baseline:
+
+    python benchmark.py --sizes 1000,100000 --json baseline.json
+    python benchmark.py --sizes 1000,100000 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = [
+    "budget", "transport", "schools", "hospitals", "population", "housing", "energy", "water",
+    "roads", "elections", "crime", "air", "parks", "tourism", "employment", "census",
+    "бюджет", "транспорт", "школы", "больницы", "население", "жильё", "энергия", "вода",
+    "дороги", "выборы", "экология", "парки", "туризм", "занятость", "перепись", "казань",
+]
+CATEGORIES = ["general", "economy", "health", "education", "transport", "environment", "society", "government"]
+FORMATS = ["CSV", "JSON", "XLSX", "XML", "PDF"]
+FILE_SIZES = [4 * 1024, 1024 * 1024, 16 * 1024 * 1024]
+UPLOAD_SIZE = 256 * 1024
+SCENARIOS = ["list", "search", "detail", "download", "upload"]
+
+
+def _csv_bytes(size: int, rng: random.Random) -> bytes:
+    lines = ["id,district,year,value,label"]
+    total = len(lines[0]) + 1
+    row = 0
+    while total < size:
+        line = f"{row},{rng.choice(WORDS)},{2000 + row % 25},{rng.random() * 1000:.3f},{rng.choice(WORDS)}"
+        lines.append(line)
+        total += len(line.encode("utf-8")) + 1
+        row += 1
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _write_files(files_dir: str, rng: random.Random) -> List[Tuple[str, int]]:
+    folder = os.path.join(files_dir, "general", "bench", "2025-01-01")
+    os.makedirs(folder, exist_ok=True)
+    files = []
+    for size in FILE_SIZES:
+        name = f"bench-{size}.csv"
+        payload = _csv_bytes(size, rng)
+        with open(os.path.join(folder, name), "wb") as handle:
+            handle.write(payload)
+        files.append((f"/datasets/general/bench/2025-01-01/{name}", len(payload)))
+    return files
+
+
+def _record(index: int, rng: random.Random, files: List[Tuple[str, int]]) -> Dict[str, Any]:
+    category = rng.choice(CATEGORIES)
+    file_url, file_size = files[index % len(files)]
+    stamp = f"2025-{1 + index % 12:02d}-{1 + index % 28:02d}T{index % 24:02d}:00:00Z"
+    return {
+        "id": f"bench-{index:07d}",
+        "title": " ".join(rng.sample(WORDS, 3)) + f" {index}",
+        "description": " ".join(rng.choices(WORDS, k=12)),
+        "category": {"id": category, "name": category.title(), "description": ""},
+        "tags": rng.sample(WORDS, 2),
+        "format": rng.choice(FORMATS),
+        "fileUrl": file_url,
+        "fileSize": file_size,
+        "source": "Benchmark",
+        "license": "Open Data",
+        "uploadedAt": stamp,
+        "lastUpdated": stamp,
+        "downloadCount": rng.randint(0, 5000),
+        "viewCount": rng.randint(0, 50000),
+        "qualityScore": rng.randint(0, 10),
+        "status": rng.choice(["approved", "pending"]),
+        "metadata": {},
+        "version": "1.0",
+        "isPublic": rng.random() > 0.1,
+        "previewData": None,
+    }
+
+
+def generate(workdir: str, size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    data_dir = os.path.join(workdir, "data")
+    files_dir = os.path.join(workdir, "datasets")
+    os.makedirs(data_dir, exist_ok=True)
+    files = _write_files(files_dir, rng)
+    # Written record by record so the 1M catalog never has to sit in memory twice.
+    with open(os.path.join(data_dir, "datasets.json"), "w", encoding="utf-8") as handle:
+        handle.write("[")
+        for index in range(size):
+            if index:
+                handle.write(",\n")
+            handle.write(json.dumps(_record(index, rng, files), ensure_ascii=False))
+        handle.write("]\n")
+
+
+def _percentile(samples: List[float], quantile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(quantile * (len(ordered) - 1))))]
+
+
+def _request_factory(scenario: str, size: int) -> Callable[[int, random.Random], Tuple[str, str, Dict[str, Any]]]:
+    def list_request(_: int, rng: random.Random) -> Tuple[str, str, Dict[str, Any]]:
+        params: Dict[str, Any] = {"page": rng.randint(1, 20), "sort": rng.choice(["recent", "popular", "name", "size"])}
+        if rng.random() < 0.5:
+            params["category"] = rng.choice(CATEGORIES)
+        return "GET", "/api/datasets", {"params": params}
+
+    def search_request(_: int, rng: random.Random) -> Tuple[str, str, Dict[str, Any]]:
+        query = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+        if rng.random() < 0.3:
+            query = query[:-2]  # type-ahead prefix
+        return "GET", "/api/datasets", {"params": {"search": query}}
+
+    def detail_request(_: int, rng: random.Random) -> Tuple[str, str, Dict[str, Any]]:
+        return "GET", f"/api/datasets/bench-{rng.randrange(size):07d}", {}
+
+    def download_request(_: int, rng: random.Random) -> Tuple[str, str, Dict[str, Any]]:
+        headers = {"Accept-Encoding": "gzip"} if rng.random() < 0.5 else {}
+        return "GET", f"/api/datasets/bench-{rng.randrange(size):07d}/download", {"headers": headers}
+
+    payload = _csv_bytes(UPLOAD_SIZE, random.Random(size))
+
+    def upload_request(number: int, _: random.Random) -> Tuple[str, str, Dict[str, Any]]:
+        # Distinct bytes per request so every upload stores a new object.
+        body = payload + f"{number},{time.time_ns()}\n".encode("ascii")
+        files = {"file": (f"upload-{number}-{time.time_ns()}.csv", body, "text/csv")}
+        return "POST", "/upload/community/bench", {"files": files}
+
+    return {
+        "list": list_request,
+        "search": search_request,
+        "detail": detail_request,
+        "download": download_request,
+        "upload": upload_request,
+    }[scenario]
+
+
+async def _drive(client: Any, scenario: str, size: int, requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    make_request = _request_factory(scenario, size)
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(number: int) -> None:
+        nonlocal errors
+        method, url, kwargs = make_request(number, rng)
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "p50Ms": _percentile(latencies, 0.5) * 1000,
+        "p99Ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def _run_worker(size: int, scenarios: List[str], requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    import httpx
+
+    started = time.perf_counter()
+    import main
+
+    startup = time.perf_counter() - started
+    results: Dict[str, Any] = {"startupSeconds": startup, "scenarios": {}}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in scenarios:
+                # A short warm-up so one-off costs (digests, compressed variants) are not measured.
+                await _drive(client, scenario, size, min(requests, 20), concurrency, seed + 1)
+                results["scenarios"][scenario] = await _drive(client, scenario, size, requests, concurrency, seed)
+    return results
+
+
+def run_size(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix=f"innocivic-bench-{size}-")
+    try:
+        generate(workdir, size, args.seed)
+        env = dict(
+            os.environ,
+            INNOCIVIC_DATA_DIR=os.path.join(workdir, "data"),
+            INNOCIVIC_FILES_DIR=os.path.join(workdir, "datasets"),
+            INNOCIVIC_INGEST_WORKERS="1",
+        )
+        command = [
+            sys.executable, os.path.abspath(__file__), "--worker", str(size),
+            "--scenarios", ",".join(args.scenarios), "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency), "--seed", str(args.seed),
+        ]
+        completed = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Benchmark worker for {size} entries failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for size, current in results.items():
+        previous = baseline.get(size)
+        if previous is None:
+            continue
+        for scenario, stats in current["scenarios"].items():
+            before = previous["scenarios"].get(scenario)
+            if before is None:
+                continue
+            if stats["throughput"] < before["throughput"] * (1 - tolerance):
+                regressions.append(
+                    f"{size}/{scenario}: throughput {stats['throughput']:.1f} req/s < {before['throughput']:.1f} req/s"
+                )
+            if stats["p99Ms"] > before["p99Ms"] * (1 + tolerance):
+                regressions.append(f"{size}/{scenario}: p99 {stats['p99Ms']:.2f} ms > {before['p99Ms']:.2f} ms")
+    return regressions
+
+
+def _print_table(results: Dict[str, Any]) -> None:
+    print(f"{'size':>9} {'scenario':<10} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for size, result in results.items():
+        print(f"{size:>9} {'startup':<10} {'':>10} {result['startupSeconds'] * 1000:>9.1f}")
+        for scenario, stats in result["scenarios"].items():
+            print(
+                f"{size:>9} {scenario:<10} {stats['throughput']:>10.1f} "
+                f"{stats['p50Ms']:>9.2f} {stats['p99Ms']:>9.2f} {stats['errors']:>7}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000", help="comma-separated catalog sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--compare", dest="baseline_path", help="fail if results regress against this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.worker is not None:
+        result = asyncio.run(_run_worker(args.worker, args.scenarios, args.requests, args.concurrency, args.seed))
+        print(json.dumps(result))
+        return 0
+
+    results = {str(size): run_size(int(size), args) for size in args.sizes.split(",") if size}
+    _print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.baseline_path:
+        with open(args.baseline_path, "r", encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import base64
+import binascii
+import json
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+Record = Dict[str, Any]
+SortKey = Tuple[Any, str]
+
+FACET_TAG_LIMIT = 50
+# Below this fraction of the catalog it is cheaper to sort the matching ids
+# directly than to walk the precomputed order skipping non-matches.
+SMALL_RESULT_RATIO = 0.125
+
+
+# Extractors tolerate malformed records (legacy data, hand-edited snapshots):
+# a field of the wrong shape is indexed as missing rather than raising.
+
+
+def _number(value: Any) -> float:
+    try:
+        number = float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(number) else number
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def _category(dataset: Record) -> Record:
+    category = dataset.get("category")
+    return category if isinstance(category, dict) else {}
+
+
+def _category_id(dataset: Record) -> str:
+    return _text(_category(dataset).get("id")) or "uncategorized"
+
+
+def _tags(dataset: Record) -> Set[str]:
+    tags = dataset.get("tags")
+    return {tag for tag in tags if isinstance(tag, str)} if isinstance(tags, list) else set()
+
+
+FACETS: Dict[str, Callable[[Record], Iterable[Any]]] = {
+    "category": lambda dataset: [_category_id(dataset)],
+    "format": lambda dataset: [_text(dataset.get("format"))] if _text(dataset.get("format")) else [],
+    "tag": _tags,
+    "status": lambda dataset: [_text(dataset.get("status"))] if _text(dataset.get("status")) else [],
+    "isPublic": lambda dataset: [bool(dataset.get("isPublic", True))],
+}
+
+# name -> (key function, descending)
+SORTS: Dict[str, Tuple[Callable[[Record], Any], bool]] = {
+    "recent": (lambda dataset: _text(dataset.get("uploadedAt")), True),
+    "popular": (lambda dataset: _number(dataset.get("downloadCount")), True),
+    "name": (lambda dataset: _text(dataset.get("title")).casefold(), False),
+    "size": (lambda dataset: _number(dataset.get("fileSize")), True),
+}
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("Malformed cursor")
+    return payload
+
+
+class CatalogIndex:
+    """Secondary indexes over the catalog: facet postings and sort orders.
+
+    Each sort order is a list of ``(key, id)`` tuples kept sorted with bisect,
+    so listing a page walks only the entries it returns. Facet values map to
+    sets of ids that filtered queries intersect.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._facets: Dict[str, Dict[Any, Set[str]]] = {name: {} for name in FACETS}
+        self._orders: Dict[str, List[SortKey]] = {name: [] for name in SORTS}
+        self._doc_facets: Dict[str, Dict[str, Iterable[Any]]] = {}
+        self._doc_keys: Dict[str, Dict[str, SortKey]] = {}
+        self._categories: Dict[str, Record] = {}
+
+    def __call__(self, old: Optional[Record], new: Optional[Record]) -> None:
+        with self._lock:
+            if old is not None:
+                self._remove(old["id"])
+            if new is not None:
+                self._add(new)
+
+    def load(self, datasets: List[Record]) -> None:
+        """Replace the index contents with ``datasets``, sorting each order once at the end."""
+        with self._lock:
+            self._clear()
+            for dataset in datasets:
+                self._add(dataset, bulk=True)
+            for order in self._orders.values():
+                order.sort()
+
+    def _add(self, dataset: Record, bulk: bool = False) -> None:
+        doc_id = dataset["id"]
+        doc_facets = {name: list(extract(dataset)) for name, extract in FACETS.items()}
+        for name, values in doc_facets.items():
+            for value in values:
+                self._facets[name].setdefault(value, set()).add(doc_id)
+        self._doc_facets[doc_id] = doc_facets
+
+        doc_keys = {}
+        for name, (key_fn, _) in SORTS.items():
+            entry = (key_fn(dataset), doc_id)
+            if bulk:
+                self._orders[name].append(entry)
+            else:
+                insort(self._orders[name], entry)
+            doc_keys[name] = entry
+        self._doc_keys[doc_id] = doc_keys
+
+        category = _category(dataset)
+        category_id = _category_id(dataset)
+        if category_id not in self._categories:
+            self._categories[category_id] = {
+                "id": category_id,
+                "name": category.get("name", "Uncategorized"),
+                "description": category.get("description", ""),
+                "icon": category.get("icon"),
+            }
+
+    def _remove(self, doc_id: str) -> None:
+        doc_facets = self._doc_facets.pop(doc_id, None)
+        if doc_facets is None:
+            return
+        for name, values in doc_facets.items():
+            postings = self._facets[name]
+            for value in values:
+                postings[value].discard(doc_id)
+                if not postings[value]:
+                    del postings[value]
+                    if name == "category":
+                        self._categories.pop(value, None)
+
+        for name, entry in self._doc_keys.pop(doc_id).items():
+            order = self._orders[name]
+            del order[bisect_left(order, entry)]
+
+    def categories(self) -> List[Record]:
+        with self._lock:
+            postings = self._facets["category"]
+            return [
+                {**info, "datasetCount": len(postings.get(category_id, ()))}
+                for category_id, info in self._categories.items()
+            ]
+
+    def _matching(self, filters: Dict[str, Any], candidates: Optional[Iterable[str]]) -> Optional[Set[str]]:
+        sets: List[Set[str]] = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            sets.append(self._facets[name].get(value, set()))
+        if candidates is not None:
+            sets.append(set(candidates))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    def _facet_counts(self, matching: Optional[Set[str]]) -> Dict[str, Dict[str, int]]:
+        counts: Dict[str, Dict[Any, int]] = {name: {} for name in FACETS}
+        if matching is None:
+            for name, postings in self._facets.items():
+                counts[name] = {value: len(ids) for value, ids in postings.items()}
+        else:
+            for doc_id in matching:
+                for name, values in self._doc_facets[doc_id].items():
+                    bucket = counts[name]
+                    for value in values:
+                        bucket[value] = bucket.get(value, 0) + 1
+
+        result: Dict[str, Dict[str, int]] = {}
+        for name, bucket in counts.items():
+            items = sorted(bucket.items(), key=lambda item: (-item[1], str(item[0])))
+            if name == "tag":
+                items = items[:FACET_TAG_LIMIT]
+            result[name] = {str(value).lower() if isinstance(value, bool) else str(value): n for value, n in items}
+        return result
+
+    def _walk(self, sort: str, start: Optional[SortKey]) -> Iterator[SortKey]:
+        order = self._orders[sort]
+        descending = SORTS[sort][1]
+        if descending:
+            position = len(order) - 1 if start is None else bisect_left(order, start) - 1
+            while position >= 0:
+                yield order[position]
+                position -= 1
+        else:
+            position = 0 if start is None else bisect_right(order, start)
+            while position < len(order):
+                yield order[position]
+                position += 1
+
+    def query(
+        self,
+        sort: str,
+        filters: Dict[str, Any],
+        offset: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        ranked: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Return ``{"ids", "total", "nextCursor", "facets"}`` for one page.
+
+        ``ranked`` restricts results to search hits; with ``sort="relevance"``
+        their order is kept as given. Raises ``ValueError`` for a cursor that
+        does not belong to ``sort`` and ``TypeError`` for one whose key has
+        the wrong type.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and after.get("sort") != sort:
+            raise ValueError("Cursor does not match sort order")
+
+        with self._lock:
+            matching = self._matching(filters, ranked)
+            facets = self._facet_counts(matching)
+
+            if sort == "relevance":
+                ordered = [doc_id for doc_id in ranked or [] if matching is None or doc_id in matching]
+                start = int(after.get("offset", 0)) if after else offset
+                ids = ordered[start : start + limit]
+                total = len(ordered)
+                more = start + limit < total
+                next_cursor = encode_cursor({"sort": sort, "offset": start + limit}) if more else None
+                return {"ids": ids, "total": total, "nextCursor": next_cursor, "facets": facets}
+
+            descending = SORTS[sort][1]
+            start_key = (after.get("key"), str(after.get("id"))) if after else None
+            total = len(self._orders[sort]) if matching is None else len(matching)
+
+            if matching is not None and len(matching) < SMALL_RESULT_RATIO * len(self._orders[sort]):
+                entries = sorted((self._doc_keys[doc_id][sort] for doc_id in matching), reverse=descending)
+                if start_key is not None:
+                    keys = entries[::-1] if descending else entries
+                    position = bisect_left(keys, start_key) if descending else bisect_right(keys, start_key)
+                    first = len(keys) - position if descending else position
+                else:
+                    first = offset
+                page = entries[first : first + limit + 1]
+            elif matching is None and start_key is None:
+                order = self._orders[sort]
+                if descending:
+                    stop = len(order) - offset
+                    page = order[max(stop - limit - 1, 0) : max(stop, 0)][::-1]
+                else:
+                    page = order[offset : offset + limit + 1]
+            else:
+                page = []
+                skip = 0 if start_key is not None else offset
+                for entry in self._walk(sort, start_key):
+                    if matching is not None and entry[1] not in matching:
+                        continue
+                    if skip:
+                        skip -= 1
+                        continue
+                    page.append(entry)
+                    if len(page) > limit:
+                        break
+
+        more = len(page) > limit
+        page = page[:limit]
+        next_cursor = None
+        if more and page:
+            key, last_id = page[-1]
+            next_cursor = encode_cursor({"sort": sort, "key": key, "id": last_id})
+        return {"ids": [doc_id for _, doc_id in page], "total": total, "nextCursor": next_cursor, "facets": facets}
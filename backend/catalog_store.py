@@ -0,0 +1,377 @@
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from metrics import timed
+
+
+Record = Dict[str, Any]
+# Deleted id -> deletion time (``None`` for deletes journaled without one).
+Tombstones = Dict[str, Optional[str]]
+Listener = Callable[[Optional[Record], Optional[Record]], None]
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write_json(path: str, payload: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+class JournalBackend:
+    """Snapshot in ``datasets.json`` plus an append-only journal of changes.
+
+    Each mutation appends one JSON line to the journal; the snapshot (and the
+    tombstones of deleted ids beside it) is only rewritten, atomically, when
+    the journal is compacted.
+    """
+
+    def __init__(
+        self, snapshot_path: str, journal_path: str, tombstones_path: str, compact_every: int = 500
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.tombstones_path = tombstones_path
+        self.compact_every = compact_every
+        self._journal_entries = 0
+        self._journal = None
+
+    def load(self) -> Tuple[List[Record], Tombstones]:
+        records: Dict[str, Record] = {}
+        tombstones: Tombstones = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as handle:
+                for record in json.load(handle):
+                    records[record["id"]] = record
+        if os.path.exists(self.tombstones_path):
+            with open(self.tombstones_path, "r", encoding="utf-8") as handle:
+                tombstones.update(json.load(handle))
+
+        if os.path.exists(self.journal_path):
+            intact = 0
+            with open(self.journal_path, "rb") as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append; everything
+                        # before it is intact.
+                        break
+                    self._replay(records, tombstones, entry)
+                    self._journal_entries += 1
+                    intact += len(line)
+            self._truncate_journal(intact)
+
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return list(records.values()), tombstones
+
+    def _truncate_journal(self, intact: int) -> None:
+        """Drop anything after the last intact entry so new appends start on a fresh line."""
+        with open(self.journal_path, "r+b") as handle:
+            if os.fstat(handle.fileno()).st_size > intact:
+                handle.truncate(intact)
+            if intact:
+                handle.seek(intact - 1)
+                if handle.read(1) != b"\n":
+                    handle.write(b"\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _replay(self, records: Dict[str, Record], tombstones: Tombstones, entry: Dict[str, Any]) -> None:
+        for op in entry.get("ops", [entry]):
+            if op["op"] == "put":
+                records[op["record"]["id"]] = op["record"]
+                tombstones.pop(op["record"]["id"], None)
+            elif op["op"] == "delete":
+                records.pop(op["id"], None)
+                tombstones[op["id"]] = op.get("deletedAt")
+
+    def write(self, ops: List[Dict[str, Any]]) -> None:
+        entry = ops[0] if len(ops) == 1 else {"op": "batch", "ops": ops}
+        self._journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_entries += 1
+
+    def needs_compaction(self) -> bool:
+        return self._journal_entries >= self.compact_every
+
+    def compact(self, records: List[Record], tombstones: Tombstones) -> None:
+        # Replaying the journal over either file is idempotent, so a crash
+        # between the two writes loses nothing.
+        _atomic_write_json(self.tombstones_path, tombstones)
+        _atomic_write_json(self.snapshot_path, records)
+        self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_entries = 0
+
+    def close(self, records: List[Record], tombstones: Tombstones) -> None:
+        if self._journal_entries:
+            self.compact(records, tombstones)
+        self._journal.close()
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) == 0:
+            os.remove(self.journal_path)
+
+
+class SqliteBackend:
+    def __init__(self, path: str, seed_path: Optional[str] = None) -> None:
+        self.path = path
+        self.seed_path = seed_path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def load(self) -> Tuple[List[Record], Tombstones]:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS datasets (id TEXT PRIMARY KEY, seq INTEGER, body TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tombstones (id TEXT PRIMARY KEY, deleted_at TEXT)")
+        count = self._conn.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
+        if not count and self.seed_path and os.path.exists(self.seed_path):
+            with open(self.seed_path, "r", encoding="utf-8") as handle:
+                seed = json.load(handle)
+            if seed:
+                self.write([{"op": "put", "record": record} for record in seed])
+
+        rows = self._conn.execute("SELECT body FROM datasets ORDER BY seq").fetchall()
+        tombstones = dict(self._conn.execute("SELECT id, deleted_at FROM tombstones").fetchall())
+        return [json.loads(body) for (body,) in rows], tombstones
+
+    def write(self, ops: List[Dict[str, Any]]) -> None:
+        with self._conn:
+            for op in ops:
+                if op["op"] == "put":
+                    record = op["record"]
+                    self._conn.execute(
+                        "INSERT INTO datasets (id, seq, body) VALUES (?, "
+                        "(SELECT COALESCE(MAX(seq), 0) + 1 FROM datasets), ?) "
+                        "ON CONFLICT(id) DO UPDATE SET body = excluded.body",
+                        (record["id"], json.dumps(record, separators=(",", ":"))),
+                    )
+                    self._conn.execute("DELETE FROM tombstones WHERE id = ?", (record["id"],))
+                elif op["op"] == "delete":
+                    self._conn.execute("DELETE FROM datasets WHERE id = ?", (op["id"],))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tombstones (id, deleted_at) VALUES (?, ?)",
+                        (op["id"], op.get("deletedAt")),
+                    )
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, records: List[Record], tombstones: Tombstones) -> None:
+        pass
+
+    def close(self, records: List[Record], tombstones: Tombstones) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class CatalogStore:
+    """Resident catalog indexed by dataset id.
+
+    Reads are served from memory. Writes are serialized behind a single lock,
+    persisted through the backend and then published to listeners as
+    ``(old, new)`` pairs so secondary indexes can update incrementally. A
+    listener that raises is rebuilt from the committed records; it never
+    aborts a write that has already been persisted. Deleted ids are kept as
+    tombstones until the id is written again, so incremental exports can
+    report deletions.
+    Returned records are shared with the store and must not be mutated.
+    """
+
+    def __init__(self, backend: Any) -> None:
+        self._backend = backend
+        self._lock = threading.RLock()
+        self._records: Dict[str, Record] = {}
+        self._tombstones: Tombstones = {}
+        self._listeners: List[Listener] = []
+        # Bumped after every committed change has been applied and published,
+        # so anything derived at version N reflects at least that state.
+        self.version = 0
+        with timed("catalog_load"):
+            records, self._tombstones = backend.load()
+            for record in records:
+                self._records[record["id"]] = record
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, dataset_id: str) -> bool:
+        return dataset_id in self._records
+
+    def get(self, dataset_id: str) -> Optional[Record]:
+        return self._records.get(dataset_id)
+
+    def all(self) -> List[Record]:
+        return list(self._records.values())
+
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self.all())
+
+    def tombstones(self) -> Tombstones:
+        return dict(self._tombstones)
+
+    def subscribe(self, listener: Listener, replay: bool = True) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+            if replay:
+                self._rebuild(listener)
+
+    def _rebuild(self, listener: Listener) -> None:
+        load = getattr(listener, "load", None)
+        if load is not None:
+            # Indexes that can build in bulk avoid one incremental update per record.
+            try:
+                load(list(self._records.values()))
+            except Exception:
+                logger.exception("Catalog listener %r failed to load", listener)
+            return
+        for record in self._records.values():
+            try:
+                listener(None, record)
+            except Exception:
+                logger.exception("Catalog listener %r rejected record %s", listener, record.get("id"))
+
+    def _publish(self, changes: List[Tuple[Optional[Record], Optional[Record]]]) -> None:
+        # By now the change is persisted and applied to ``_records``, so a
+        # failing listener is resynchronized instead of unwinding the write.
+        for listener in self._listeners:
+            try:
+                for old, new in changes:
+                    listener(old, new)
+            except Exception:
+                logger.exception("Catalog listener %r failed; rebuilding it", listener)
+                self._rebuild(listener)
+
+    def insert(self, record: Record) -> Record:
+        return self.insert_many([record])[0]
+
+    def insert_many(self, records: List[Record]) -> List[Record]:
+        with self._lock:
+            for record in records:
+                if record["id"] in self._records:
+                    raise KeyError(record["id"])
+            self._commit([{"op": "put", "record": record} for record in records])
+            changes = []
+            for record in records:
+                self._records[record["id"]] = record
+                self._tombstones.pop(record["id"], None)
+                changes.append((None, record))
+            self._publish(changes)
+            self.version += 1
+            self._maybe_compact()
+        return records
+
+    def upsert_many(self, records: List[Record]) -> Dict[str, Optional[Record]]:
+        """Insert or replace ``records`` in one commit.
+
+        Returns the record each distinct id replaced, or ``None`` where the id
+        was new. When an id repeats within ``records`` the last one wins.
+        """
+        latest = {record["id"]: record for record in records}
+        with self._lock:
+            changes = [(self._records.get(dataset_id), record) for dataset_id, record in latest.items()]
+            if not changes:
+                return {}
+            self._commit([{"op": "put", "record": record} for record in latest.values()])
+            for _, new in changes:
+                self._records[new["id"]] = new
+                self._tombstones.pop(new["id"], None)
+            self._publish(changes)
+            self.version += 1
+            self._maybe_compact()
+        return {new["id"]: old for old, new in changes}
+
+    def update(self, dataset_id: str, mutate: Callable[[Record], None]) -> Optional[Record]:
+        result = self.update_many({dataset_id: mutate})
+        return result.get(dataset_id)
+
+    def update_many(
+        self, mutations: Dict[str, Callable[[Record], None]], bump_version: bool = True
+    ) -> Dict[str, Record]:
+        """Apply ``mutations`` to copies of the records and commit them as one write.
+
+        With ``bump_version=False`` the change is persisted and indexed but
+        ``version`` stays put, so responses cached for it keep being served.
+        """
+        with self._lock:
+            changes = []
+            for dataset_id, mutate in mutations.items():
+                old = self._records.get(dataset_id)
+                if old is None:
+                    continue
+                new = copy.deepcopy(old)
+                mutate(new)
+                changes.append((old, new))
+            if not changes:
+                return {}
+            self._commit([{"op": "put", "record": new} for _, new in changes])
+            for _, new in changes:
+                self._records[new["id"]] = new
+            self._publish(changes)
+            if bump_version:
+                self.version += 1
+            self._maybe_compact()
+        return {new["id"]: new for _, new in changes}
+
+    def delete(self, dataset_id: str, deleted_at: str) -> Optional[Record]:
+        return self.delete_many([dataset_id], deleted_at).get(dataset_id)
+
+    def delete_many(self, dataset_ids: List[str], deleted_at: str) -> Dict[str, Record]:
+        """Delete the existing ids in one commit, returning the removed records."""
+        with self._lock:
+            removed = {
+                dataset_id: self._records[dataset_id] for dataset_id in dataset_ids if dataset_id in self._records
+            }
+            if not removed:
+                return {}
+            self._commit([{"op": "delete", "id": dataset_id, "deletedAt": deleted_at} for dataset_id in removed])
+            for dataset_id in removed:
+                del self._records[dataset_id]
+                self._tombstones[dataset_id] = deleted_at
+            self._publish([(old, None) for old in removed.values()])
+            self.version += 1
+            self._maybe_compact()
+        return removed
+
+    def _commit(self, ops: List[Dict[str, Any]]) -> None:
+        with timed("catalog_save"):
+            self._backend.write(ops)
+
+    def _maybe_compact(self) -> None:
+        if self._backend.needs_compaction():
+            self.compact()
+
+    def compact(self) -> None:
+        with self._lock, timed("catalog_compact"):
+            self._backend.compact(list(self._records.values()), dict(self._tombstones))
+
+    def close(self) -> None:
+        with self._lock:
+            self._backend.close(list(self._records.values()), dict(self._tombstones))
+
+
+def open_catalog(data_dir: str, backend: str = "json") -> CatalogStore:
+    snapshot_path = os.path.join(data_dir, "datasets.json")
+    if backend == "sqlite":
+        return CatalogStore(SqliteBackend(os.path.join(data_dir, "datasets.sqlite3"), seed_path=snapshot_path))
+    if backend != "json":
+        raise ValueError(f"Unknown catalog backend '{backend}'")
+    return CatalogStore(
+        JournalBackend(
+            snapshot_path,
+            os.path.join(data_dir, "datasets.journal"),
+            os.path.join(data_dir, "datasets.tombstones.json"),
+        )
+    )
@@ -0,0 +1,372 @@
+import json
+import os
+import shutil
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import profiler
+from delivery import is_sha256
+
+
+TABULAR_EXTENSIONS = {".csv", ".tsv", ".json", ".xlsx"}
+RESULT_CACHE_SIZE = 512
+TABLE_CACHE_SIZE = 32
+MAX_GROUPS = 10000
+INTERVALS = {"day": "D", "week": "W", "month": "M", "year": "Y"}
+FILTER_OPS = {"eq", "ne", "gt", "gte", "lt", "lte", "in"}
+# storage kind -> (array typecode used while building, on-disk dtype)
+TYPECODES = {
+    "number": ("d", np.float64),
+    "datetime": ("q", np.int64),
+    "boolean": ("b", np.int8),
+    "string": ("i", np.int32),
+}
+
+_tables: "OrderedDict[str, ColumnarTable]" = OrderedDict()
+_results: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class AggregateError(ValueError):
+    pass
+
+
+def _epoch_seconds(iso: str) -> Optional[int]:
+    try:
+        moment = datetime.fromisoformat(iso)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _storage_kind(column_type: str) -> str:
+    if column_type in ("integer", "number"):
+        return "number"
+    if column_type in ("date", "datetime"):
+        return "datetime"
+    if column_type == "boolean":
+        return "boolean"
+    return "string"
+
+
+def table_path(cache_dir: str, sha256: str) -> str:
+    if not is_sha256(sha256):
+        raise ValueError("Invalid content digest")
+    return os.path.join(cache_dir, sha256[:2], sha256)
+
+
+def build_columnar(path: str, schema: List[Dict[str, str]], cache_dir: str, sha256: str) -> str:
+    """Convert a tabular file into one ``.npy`` file per column.
+
+    Numbers are float64 (NaN for nulls), dates are int64 epoch seconds
+    (``NaT`` sentinel for nulls), booleans are int8 (-1 for nulls) and
+    strings are int32 codes into a per-column dictionary (-1 for nulls).
+    """
+    target = table_path(cache_dir, sha256)
+    if os.path.exists(os.path.join(target, "meta.json")):
+        return target
+
+    kinds = {column["name"]: _storage_kind(column["type"]) for column in schema}
+    buffers: Dict[str, array] = {}
+    dictionaries: Dict[str, Dict[str, int]] = {}
+    nat = int(np.iinfo(np.int64).min)
+    for name, kind in kinds.items():
+        buffers[name] = array(TYPECODES[kind][0])
+        if kind == "string":
+            dictionaries[name] = {}
+
+    rows = 0
+    for record in profiler.iter_records(path):
+        rows += 1
+        for name, kind in kinds.items():
+            value_type, value = profiler.classify(record.get(name))
+            buffer = buffers[name]
+            if kind == "number":
+                buffer.append(float(value) if value_type in ("integer", "number") else float("nan"))
+            elif kind == "datetime":
+                seconds = _epoch_seconds(value) if value_type in ("date", "datetime") else None
+                buffer.append(nat if seconds is None else seconds)
+            elif kind == "boolean":
+                buffer.append(int(value) if value_type == "boolean" else -1)
+            elif value_type == "null":
+                buffer.append(-1)
+            else:
+                dictionary = dictionaries[name]
+                text = str(value)
+                code = dictionary.get(text)
+                if code is None:
+                    code = dictionary[text] = len(dictionary)
+                buffer.append(code)
+
+    tmp_target = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    os.makedirs(tmp_target)
+    columns = []
+    for position, (name, kind) in enumerate(kinds.items()):
+        filename = f"col_{position}.npy"
+        values = np.frombuffer(buffers[name], dtype=TYPECODES[kind][1])
+        np.save(os.path.join(tmp_target, filename), values)
+        column: Dict[str, Any] = {"name": name, "kind": kind, "file": filename}
+        if kind == "string":
+            column["dictionary"] = list(dictionaries[name])
+        columns.append(column)
+    with open(os.path.join(tmp_target, "meta.json"), "w", encoding="utf-8") as handle:
+        json.dump({"version": 1, "sha256": sha256, "rows": rows, "columns": columns}, handle, ensure_ascii=False)
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.rename(tmp_target, target)
+    except OSError:
+        # Another worker finished the same content first.
+        shutil.rmtree(tmp_target, ignore_errors=True)
+    return target
+
+
+class ColumnarTable:
+    def __init__(self, directory: str) -> None:
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        self.sha256: str = meta["sha256"]
+        self.rows: int = meta["rows"]
+        self.columns: Dict[str, Dict[str, Any]] = {column["name"]: column for column in meta["columns"]}
+        self._directory = directory
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lookups: Dict[str, Dict[str, int]] = {}
+
+    def column(self, name: str) -> Dict[str, Any]:
+        column = self.columns.get(name)
+        if column is None:
+            raise AggregateError(f"Unknown column '{name}'")
+        return column
+
+    def values(self, name: str) -> np.ndarray:
+        array_ = self._arrays.get(name)
+        if array_ is None:
+            array_ = np.load(os.path.join(self._directory, self.column(name)["file"]), mmap_mode="r")
+            self._arrays[name] = array_
+        return array_
+
+    def code_of(self, name: str, text: str) -> int:
+        lookup = self._lookups.get(name)
+        if lookup is None:
+            lookup = self._lookups[name] = {value: code for code, value in enumerate(self.column(name)["dictionary"])}
+        return lookup.get(text, -2)
+
+
+def open_table(cache_dir: str, sha256: str) -> Optional[ColumnarTable]:
+    if not is_sha256(sha256):
+        return None
+    with _cache_lock:
+        table = _tables.get(sha256)
+        if table is not None:
+            _tables.move_to_end(sha256)
+            return table
+    directory = table_path(cache_dir, sha256)
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        return None
+    table = ColumnarTable(directory)
+    with _cache_lock:
+        _tables[sha256] = table
+        while len(_tables) > TABLE_CACHE_SIZE:
+            _tables.popitem(last=False)
+    return table
+
+
+def _parse_scalar(kind: str, raw: str) -> Any:
+    if kind == "number":
+        number = profiler.parse_number(raw)
+        if number is None:
+            raise AggregateError(f"Expected a number, got '{raw}'")
+        return number
+    if kind == "datetime":
+        iso = profiler.parse_date(raw)
+        seconds = _epoch_seconds(iso) if iso else None
+        if seconds is None:
+            raise AggregateError(f"Expected a date, got '{raw}'")
+        return seconds
+    if kind == "boolean":
+        return 1 if raw.lower() in ("true", "yes", "да", "1") else 0
+    return raw
+
+
+def _filter_mask(table: ColumnarTable, expression: str) -> np.ndarray:
+    try:
+        name, op, raw = expression.split(":", 2)
+    except ValueError:
+        raise AggregateError(f"Filter must look like column:op:value, got '{expression}'")
+    if op not in FILTER_OPS:
+        raise AggregateError(f"Unsupported filter operator '{op}'")
+    kind = table.column(name)["kind"]
+    values = table.values(name)
+
+    if kind == "string":
+        if op == "in":
+            codes = [table.code_of(name, item) for item in raw.split("|")]
+            return np.isin(values, codes)
+        if op not in ("eq", "ne"):
+            raise AggregateError("Text columns only support eq, ne and in")
+        code = table.code_of(name, raw)
+        return values == code if op == "eq" else (values != code) & (values >= 0)
+
+    if op == "in":
+        targets = [_parse_scalar(kind, item) for item in raw.split("|")]
+        return np.isin(values, targets)
+    target = _parse_scalar(kind, raw)
+    comparisons = {
+        "eq": np.equal,
+        "ne": np.not_equal,
+        "gt": np.greater,
+        "gte": np.greater_equal,
+        "lt": np.less,
+        "lte": np.less_equal,
+    }
+    mask = comparisons[op](values, target)
+    return mask & _present(kind, values)
+
+
+def _present(kind: str, values: np.ndarray) -> np.ndarray:
+    if kind == "number":
+        return ~np.isnan(values)
+    if kind == "datetime":
+        return values != np.iinfo(np.int64).min
+    return values >= 0
+
+
+def _group_keys(
+    table: ColumnarTable,
+    mask: np.ndarray,
+    group_by: Optional[str],
+    bin_column: Optional[str],
+    bins: int,
+    interval: Optional[str],
+) -> Tuple[np.ndarray, List[Any], bool]:
+    """Return per-row group ids (-1 = excluded), group labels and whether labels are ordered."""
+    if bin_column:
+        kind = table.column(bin_column)["kind"]
+        if kind != "number":
+            raise AggregateError("bin requires a numeric column")
+        values = table.values(bin_column)
+        usable = mask & _present(kind, values)
+        if not usable.any():
+            return np.full(len(values), -1, dtype=np.int64), [], True
+        edges = np.histogram_bin_edges(values[usable], bins=bins)
+        ids = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+        labels = [{"from": float(edges[i]), "to": float(edges[i + 1])} for i in range(len(edges) - 1)]
+        return np.where(usable, ids, -1), labels, True
+
+    if not group_by:
+        return np.where(mask, 0, -1), ["all"], True
+
+    column = table.column(group_by)
+    kind = column["kind"]
+    values = table.values(group_by)
+    usable = mask & _present(kind, values)
+
+    if kind == "string":
+        return np.where(usable, values, -1), list(column["dictionary"]), False
+    if kind == "boolean":
+        return np.where(usable, values, -1), [False, True], True
+    if kind == "datetime":
+        unit = INTERVALS.get(interval or "day")
+        if unit is None:
+            raise AggregateError(f"Unsupported interval '{interval}'")
+        buckets = values[usable].astype("datetime64[s]").astype(f"datetime64[{unit}]")
+        uniques, inverse = np.unique(buckets, return_inverse=True)
+        ids = np.full(len(values), -1, dtype=np.int64)
+        ids[usable] = inverse
+        return ids, [str(key) for key in uniques], True
+
+    uniques, inverse = np.unique(values[usable], return_inverse=True)
+    ids = np.full(len(values), -1, dtype=np.int64)
+    ids[usable] = inverse
+    return ids, [float(key) for key in uniques], True
+
+
+def aggregate(
+    table: ColumnarTable,
+    group_by: Optional[str] = None,
+    agg: str = "count",
+    value: Optional[str] = None,
+    filters: Optional[List[str]] = None,
+    bin_column: Optional[str] = None,
+    bins: int = 20,
+    interval: Optional[str] = None,
+    top: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Vectorized group-by/histogram/time-bucket aggregation, memoized per content hash."""
+    if agg not in ("count", "sum", "avg", "min", "max"):
+        raise AggregateError(f"Unsupported aggregation '{agg}'")
+    if agg != "count" and not value:
+        raise AggregateError(f"'{agg}' requires a value column")
+
+    key = (table.sha256, group_by, agg, value, tuple(sorted(filters or [])), bin_column, bins, interval, top)
+    with _cache_lock:
+        cached = _results.get(key)
+        if cached is not None:
+            _results.move_to_end(key)
+            return cached
+
+    mask = np.ones(table.rows, dtype=bool)
+    for expression in filters or []:
+        mask &= _filter_mask(table, expression)
+
+    ids, labels, ordered = _group_keys(table, mask, group_by, bin_column, bins, interval)
+    group_count = len(labels)
+    selected = ids >= 0
+
+    if value:
+        value_column = table.column(value)
+        if value_column["kind"] != "number" and agg != "count":
+            raise AggregateError(f"'{agg}' requires a numeric value column")
+        if value_column["kind"] == "number":
+            measures = np.asarray(table.values(value))
+            selected &= ~np.isnan(measures)
+        else:
+            measures = None
+            selected &= _present(value_column["kind"], table.values(value))
+    else:
+        measures = None
+
+    group_ids = ids[selected]
+    counts = np.bincount(group_ids, minlength=group_count)
+    if agg == "count":
+        results = counts.astype(np.float64)
+    else:
+        picked = measures[selected]
+        if agg in ("sum", "avg"):
+            results = np.bincount(group_ids, weights=picked, minlength=group_count)
+            if agg == "avg":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    results = results / counts
+        else:
+            fill = np.inf if agg == "min" else -np.inf
+            results = np.full(group_count, fill)
+            (np.minimum if agg == "min" else np.maximum).at(results, group_ids, picked)
+
+    present = np.nonzero(counts)[0] if group_count else np.array([], dtype=np.int64)
+    if top is not None or not ordered:
+        present = present[np.argsort(-results[present], kind="stable")]
+    limit = min(top, MAX_GROUPS) if top is not None else MAX_GROUPS
+    truncated = len(present) > limit
+    present = present[:limit]
+
+    result = {
+        "groups": [
+            {"key": labels[index], "value": float(results[index]), "count": int(counts[index])} for index in present
+        ],
+        "rows": int(selected.sum()),
+        "totalRows": table.rows,
+        "truncated": truncated,
+    }
+    with _cache_lock:
+        _results[key] = result
+        while len(_results) > RESULT_CACHE_SIZE:
+            _results.popitem(last=False)
+    return result
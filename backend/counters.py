@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from catalog_store import CatalogStore
+
+
+CounterKey = Tuple[str, str]
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """Write-behind aggregation of per-dataset counters such as ``downloadCount``.
+
+    Increments land in one of several lock-sharded dictionaries and are
+    applied to the catalog as a single batch every ``interval`` seconds and on
+    ``stop()``, so at most one interval of counts is lost on a crash.
+
+    Flushes only bump the catalog version (and so invalidate cached responses)
+    once every ``publish_interval`` seconds; in between, cached bodies may show
+    counts up to that old.
+    """
+
+    def __init__(
+        self, store: CatalogStore, interval: float = 5.0, publish_interval: float = 60.0, shards: int = 16
+    ) -> None:
+        self.store = store
+        self.interval = interval
+        self.publish_interval = publish_interval
+        self._published_at = time.monotonic()
+        self._shards: List[Dict[CounterKey, int]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def increment(self, dataset_id: str, field: str, amount: int = 1) -> None:
+        index = hash(dataset_id) % len(self._shards)
+        key = (dataset_id, field)
+        with self._locks[index]:
+            shard = self._shards[index]
+            shard[key] = shard.get(key, 0) + amount
+
+    def _drain(self) -> Dict[CounterKey, int]:
+        pending: Dict[CounterKey, int] = {}
+        for index, lock in enumerate(self._locks):
+            with lock:
+                shard, self._shards[index] = self._shards[index], {}
+            for key, amount in shard.items():
+                pending[key] = pending.get(key, 0) + amount
+        return pending
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            pending = self._drain()
+            if not pending:
+                return 0
+
+            per_dataset: Dict[str, Dict[str, int]] = {}
+            for (dataset_id, field), amount in pending.items():
+                per_dataset.setdefault(dataset_id, {})[field] = amount
+
+            def apply(increments: Dict[str, int]) -> Callable[[Dict[str, Any]], None]:
+                def mutate(record: Dict[str, Any]) -> None:
+                    for field, amount in increments.items():
+                        record[field] = (record.get(field) or 0) + amount
+
+                return mutate
+
+            publish = time.monotonic() - self._published_at >= self.publish_interval
+            try:
+                self.store.update_many(
+                    {dataset_id: apply(fields) for dataset_id, fields in per_dataset.items()}, bump_version=publish
+                )
+            except Exception:
+                # Keep the counts for the next attempt rather than dropping them.
+                for (dataset_id, field), amount in pending.items():
+                    self.increment(dataset_id, field, amount)
+                raise
+            if publish:
+                self._published_at = time.monotonic()
+            return len(pending)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # The counts were put back; the next interval retries them.
+                logger.exception("Counter flush failed")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
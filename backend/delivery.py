@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: only gzip variants are produced without it
+    zstandard = None
+
+from metrics import timed
+
+
+COMPRESSIBLE_EXTENSIONS = {".csv", ".tsv", ".json", ".xml"}
+DIGEST_CACHE_SIZE = 4096
+CHUNK_SIZE = 1024 * 1024
+SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+_digest_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_digest_lock = threading.Lock()
+# One lock per variant being built, so compressing one file never blocks
+# requests for another; entries disappear once no build holds them.
+_variant_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_variant_locks_guard = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of ``path``, memoized on ``(path, size, mtime)``."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digest_cache.get(key)
+        if digest is not None:
+            _digest_cache.move_to_end(key)
+            return digest
+
+    hasher = hashlib.sha256()
+    with timed("file_hash"), open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+
+    with _digest_lock:
+        _digest_cache[key] = digest
+        while len(_digest_cache) > DIGEST_CACHE_SIZE:
+            _digest_cache.popitem(last=False)
+    return digest
+
+
+def is_sha256(value: Any) -> bool:
+    """Whether ``value`` is a lowercase hex SHA-256, safe to use as a file name."""
+    return isinstance(value, str) and SHA256_RE.fullmatch(value) is not None
+
+
+def available_encodings() -> List[str]:
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], path: str) -> Optional[str]:
+    if not accept_encoding or os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _compress(source: str, target: str, encoding: str) -> None:
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        if encoding == "zstd":
+            with zstandard.ZstdCompressor(level=10).stream_writer(dst, closefd=False) as writer:
+                shutil.copyfileobj(src, writer, CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6, mtime=0) as writer:
+                shutil.copyfileobj(src, writer, CHUNK_SIZE)
+
+
+def compressed_variant(path: str, digest: str, encoding: str, variants_dir: str) -> Optional[str]:
+    """Path of the ``encoding`` variant of ``path``, building it on first use.
+
+    Variants are keyed by content digest so every alias of the same bytes
+    shares one file. Returns ``None`` when compression does not pay off, or
+    while another request is still building the variant.
+    """
+    if not is_sha256(digest):
+        raise ValueError("Invalid content digest")
+    suffix = ".zst" if encoding == "zstd" else ".gz"
+    target = os.path.join(variants_dir, digest[:2], digest + suffix)
+    skipped = target + ".skip"
+    if os.path.exists(target):
+        return target
+    if os.path.exists(skipped):
+        return None
+
+    with _variant_locks_guard:
+        lock = _variant_locks.setdefault(target, threading.Lock())
+    if not lock.acquire(blocking=False):
+        # Another request is building this variant; serve identity meanwhile.
+        return None
+    try:
+        if os.path.exists(target):
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            with timed("file_compress"):
+                _compress(path, tmp_path, encoding)
+            if os.path.getsize(tmp_path) >= os.path.getsize(path) * 0.9:
+                open(skipped, "w").close()
+                return None
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    finally:
+        lock.release()
+    return target
+
+
+def etag_matches(if_none_match: Optional[str], etags: List[str]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides.
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag.removeprefix("W/") in candidates for etag in etags)
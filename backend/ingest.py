@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+import columnar
+import profiler
+import row_index
+from catalog_store import CatalogStore
+from delivery import file_digest
+
+
+MAX_TRACKED_JOBS = 1000
+# Metadata that is only valid for the exact file it was computed from.
+FILE_METADATA_FIELDS = ("sha256", "rowIndexed", "columnar")
+
+
+def run_ingest(path: str, row_index_dir: str, columnar_dir: str) -> Dict[str, Any]:
+    """Worker-process entry point for one dataset file."""
+    profile = profiler.profile_file(path)
+    ext = os.path.splitext(path)[1].lower()
+    if ext in row_index.INDEXED_EXTENSIONS:
+        index = row_index.build_row_index(path)
+        row_index.write_row_index(row_index_dir, index)
+        profile.update({"sha256": index["sha256"], "rowIndexed": True})
+    else:
+        profile.update({"sha256": file_digest(path), "rowIndexed": False})
+    profile["columnar"] = ext in columnar.TABULAR_EXTENSIONS
+    if profile["columnar"]:
+        columnar.build_columnar(path, profile["schema"], columnar_dir, profile["sha256"])
+    return profile
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class IngestQueue:
+    """Profiles uploaded files in a pool of worker processes.
+
+    Results are written back to the dataset record; job state is kept in
+    memory for the most recent ``MAX_TRACKED_JOBS`` jobs.
+    """
+
+    def __init__(
+        self,
+        store: CatalogStore,
+        resolve_path: Callable[[Dict[str, Any]], str],
+        row_index_dir: str,
+        columnar_dir: str,
+        workers: int = 2,
+    ) -> None:
+        self.store = store
+        self.resolve_path = resolve_path
+        self.row_index_dir = row_index_dir
+        self.columnar_dir = columnar_dir
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._latest: Dict[str, str] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers avoid inheriting the API process' threads and locks.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @staticmethod
+    def supports(dataset: Dict[str, Any]) -> bool:
+        file_url = dataset.get("fileUrl") or ""
+        return os.path.splitext(file_url)[1].lower() in profiler.PROFILED_EXTENSIONS
+
+    def submit(self, dataset: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.supports(dataset):
+            return None
+        path = self.resolve_path(dataset)
+
+        job = {
+            "id": str(uuid4()),
+            "datasetId": dataset["id"],
+            "fileUrl": dataset["fileUrl"],
+            "status": "queued",
+            "submittedAt": _now(),
+            "finishedAt": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._latest[dataset["id"]] = job["id"]
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                old_id, old_job = self._jobs.popitem(last=False)
+                self._futures.pop(old_id, None)
+                if self._latest.get(old_job["datasetId"]) == old_id:
+                    del self._latest[old_job["datasetId"]]
+            future = self._pool().submit(run_ingest, path, self.row_index_dir, self.columnar_dir)
+            self._futures[job["id"]] = future
+        future.add_done_callback(lambda done: self._complete(job, done))
+        return dict(job)
+
+    def _complete(self, job: Dict[str, Any], future: Future) -> None:
+        status, error = "succeeded", None
+        try:
+            profile = future.result()
+            self._apply(job, profile)
+        except Exception as exc:
+            status, error = "failed", str(exc) or exc.__class__.__name__
+        with self._lock:
+            job.update({"status": status, "error": error, "finishedAt": _now()})
+            self._futures.pop(job["id"], None)
+
+    def _apply(self, job: Dict[str, Any], profile: Dict[str, Any]) -> None:
+        def mutate(record: Dict[str, Any]) -> None:
+            # The file may have been replaced while the job was running.
+            if record.get("fileUrl") != job["fileUrl"]:
+                return
+            metadata = dict(record.get("metadata") or {})
+            metadata.update(
+                {
+                    "schema": profile["schema"],
+                    "rowCount": profile["rowCount"],
+                    "columnStats": profile["columnStats"],
+                    "sha256": profile["sha256"],
+                    "rowIndexed": profile["rowIndexed"],
+                    "columnar": profile["columnar"],
+                    "profiledAt": _now(),
+                }
+            )
+            record["metadata"] = metadata
+            record["previewData"] = profile["previewData"]
+            record["qualityScore"] = profile["qualityScore"]
+            record["lastUpdated"] = _now()
+
+        self.store.update(job["datasetId"], mutate)
+
+    def _snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job = dict(job)
+        future = self._futures.get(job_id)
+        if job["status"] == "queued" and future is not None and future.running():
+            job["status"] = "running"
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._snapshot(job_id)
+
+    def latest_for(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job_id = self._latest.get(dataset_id)
+            return self._snapshot(job_id) if job_id else None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,22 +1,79 @@
 
 import json
+import mimetypes
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Query, UploadFile
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from catalog_index import SORTS, CatalogIndex
+from columnar import AggregateError, aggregate, open_table
+from catalog_store import CatalogStore, open_catalog
+from counters import CounterBuffer
+from delivery import compressed_variant, etag_matches, file_digest, is_sha256, negotiate_encoding
+from ingest import FILE_METADATA_FIELDS, IngestQueue
+from metrics import MetricsMiddleware, registry
+from response_cache import ResponseCache, dumps
+from row_index import load_row_index, read_rows
+from search_index import SearchIndex
+from uploads import UploadStore
 
 
 BASE_DIR = os.path.dirname(__file__)
-DATA_DIR = os.path.join(BASE_DIR, "data")
+DATA_DIR = os.environ.get("INNOCIVIC_DATA_DIR", os.path.join(BASE_DIR, "data"))
 DATASETS_FILE = os.path.join(DATA_DIR, "datasets.json")
-FILES_DIR = os.path.join(BASE_DIR, "datasets")
+FILES_DIR = os.environ.get("INNOCIVIC_FILES_DIR", os.path.join(BASE_DIR, "datasets"))
+VARIANTS_DIR = os.path.join(DATA_DIR, "variants")
+ROW_INDEX_DIR = os.path.join(DATA_DIR, "rowindex")
+COLUMNAR_DIR = os.path.join(DATA_DIR, "columnar")
+CATALOG_BACKEND = os.environ.get("INNOCIVIC_CATALOG_BACKEND", "json")
+COUNTER_FLUSH_INTERVAL = float(os.environ.get("INNOCIVIC_COUNTER_FLUSH_INTERVAL", "5"))
+COUNTER_PUBLISH_INTERVAL = float(os.environ.get("INNOCIVIC_COUNTER_PUBLISH_INTERVAL", "60"))
+INGEST_WORKERS = int(os.environ.get("INNOCIVIC_INGEST_WORKERS", "2"))
 MAX_FILE_SIZE_MB = 100
+MAX_RESUMABLE_FILE_SIZE_MB = int(os.environ.get("INNOCIVIC_MAX_RESUMABLE_FILE_SIZE_MB", "2048"))
+MAX_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+MAX_IMPORT_ERRORS = 100
 ALLOWED_EXTENSIONS = {".csv", ".json", ".xml", ".xlsx", ".xls", ".pdf", ".tsv", ".zip"}
 
+_TEXT = ((str,), "a string")
+_NUMBER = ((int, float), "a number")
+_BOOLEAN = ((bool,), "a boolean")
+_OBJECT = ((dict,), "an object")
+_LIST = ((list,), "a list")
+# Expected JSON shape of dataset fields clients may set; ``None`` always means "not set".
+FIELD_TYPES: Dict[str, Tuple[Tuple[type, ...], str]] = {
+    "title": _TEXT,
+    "description": _TEXT,
+    "category": _OBJECT,
+    "tags": _LIST,
+    "format": _TEXT,
+    "fileUrl": _TEXT,
+    "fileSize": _NUMBER,
+    "source": _TEXT,
+    "license": _TEXT,
+    "geographicCoverage": _TEXT,
+    "timePeriod": _OBJECT,
+    "uploadedBy": _OBJECT,
+    "uploadedAt": _TEXT,
+    "lastUpdated": _TEXT,
+    "downloadCount": _NUMBER,
+    "viewCount": _NUMBER,
+    "qualityScore": _NUMBER,
+    "status": _TEXT,
+    "metadata": _OBJECT,
+    "version": _TEXT,
+    "isPublic": _BOOLEAN,
+}
+
 
 def _ensure_storage() -> None:
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -26,35 +83,222 @@ def _ensure_storage() -> None:
             handle.write("[]")
 
 
-def _load_datasets() -> List[Dict[str, Any]]:
-    with open(DATASETS_FILE, "r", encoding="utf-8") as handle:
-        return json.load(handle)
+def _find_dataset(dataset_id: str) -> Dict[str, Any]:
+    dataset = catalog.get(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return dataset
+
+
+def _resolve_dataset_file(dataset: Dict[str, Any]) -> str:
+    file_url = dataset.get("fileUrl")
+
+    if not file_url:
+        raise HTTPException(status_code=404, detail="Dataset file missing")
+
+    relative_part = file_url.removeprefix("/datasets/").lstrip("/")
+    files_root = os.path.realpath(FILES_DIR)
+    candidate_path = os.path.realpath(os.path.join(files_root, relative_part))
+    if not candidate_path.startswith(files_root + os.sep):
+        raise HTTPException(status_code=400, detail="Invalid dataset file location")
 
+    if not os.path.exists(candidate_path):
+        raise HTTPException(status_code=404, detail="Dataset file not found")
 
-def _save_datasets(datasets: List[Dict[str, Any]]) -> None:
-    with open(DATASETS_FILE, "w", encoding="utf-8") as handle:
-        json.dump(datasets, handle, indent=2)
+    return candidate_path
 
 
-def _find_dataset(datasets: List[Dict[str, Any]], dataset_id: str) -> Dict[str, Any]:
-    for dataset in datasets:
-        if dataset["id"] == dataset_id:
-            return dataset
-    raise HTTPException(status_code=404, detail="Dataset not found")
+def _validate_filename(raw_filename: Optional[str]) -> str:
+    filename = os.path.basename(raw_filename or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="Filename is required")
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported extension '{ext}'. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}",
+        )
+    return filename
+
+
+def _schedule_ingest(dataset: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        return ingest.submit(dataset)
+    except HTTPException:
+        # Catalog entries may point at files that are not uploaded yet.
+        return None
+
+
+def _cached_json(request: Request, key: Hashable, build: Callable[[], Dict[str, Any]]) -> Response:
+    version = catalog.version
+    entry = response_cache.get(key, version)
+    if entry is None:
+        entry = response_cache.put(key, version, build())
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), [entry.etag]):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def _check_fields(payload: Dict[str, Any]) -> None:
+    for field, (types, expected) in FIELD_TYPES.items():
+        value = payload.get(field)
+        if value is None:
+            continue
+        # bool is an int subclass but never a valid count or size.
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            raise HTTPException(status_code=400, detail=f"Field '{field}' must be {expected}")
+
+    if payload.get("title") is not None and not payload["title"].strip():
+        raise HTTPException(status_code=400, detail="Title is required")
+    tags = payload.get("tags")
+    if tags is not None and not all(isinstance(tag, str) for tag in tags):
+        raise HTTPException(status_code=400, detail="Field 'tags' must be a list of strings")
+    category = payload.get("category")
+    if category is not None and not all(isinstance(category.get(key, ""), str) for key in ("id", "name")):
+        raise HTTPException(status_code=400, detail="Category 'id' and 'name' must be strings")
+
+
+def _ingest_metadata(dataset: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = dataset.get("metadata")
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def _client_metadata(metadata: Any, current: Any = None) -> Any:
+    """``metadata`` from a client with the ingest-owned fields kept from ``current``.
+
+    The digest and cache flags name files on disk, so only ingest may set them.
+    """
+    if not isinstance(metadata, dict):
+        return metadata
+    cleaned = {key: value for key, value in metadata.items() if key not in FILE_METADATA_FIELDS}
+    if isinstance(current, dict):
+        cleaned.update({key: current[key] for key in FILE_METADATA_FIELDS if key in current})
+    return cleaned
 
 
 def _apply_updates(target: Dict[str, Any], updates: Dict[str, Any]) -> None:
+    previous_file = target.get("fileUrl")
     for key, value in updates.items():
-        if value is not None:
-            target[key] = value
+        # The id is the catalog key; a payload cannot rename a dataset.
+        if value is not None and key != "id":
+            target[key] = _client_metadata(value, target.get("metadata")) if key == "metadata" else value
+    metadata = target.get("metadata")
+    if target.get("fileUrl") != previous_file and isinstance(metadata, dict):
+        # Digest and caches describe the old file until the new one is ingested.
+        target["metadata"] = {key: value for key, value in metadata.items() if key not in FILE_METADATA_FIELDS}
+
+
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _new_dataset(payload: Dict[str, Any], now: str) -> Dict[str, Any]:
+    if payload.get("title") is None:
+        raise HTTPException(status_code=400, detail="Title is required")
+    _check_fields(payload)
+
+    return {
+        "id": str(uuid4()),
+        "title": payload.get("title"),
+        "description": payload.get("description", ""),
+        "category": payload.get("category"),
+        "tags": payload.get("tags", []),
+        "format": payload.get("format", "CSV"),
+        "fileUrl": payload.get("fileUrl"),
+        "fileSize": payload.get("fileSize", 0),
+        "source": payload.get("source"),
+        "license": payload.get("license"),
+        "geographicCoverage": payload.get("geographicCoverage"),
+        "timePeriod": payload.get("timePeriod"),
+        "uploadedBy": payload.get("uploadedBy"),
+        "uploadedAt": now,
+        "lastUpdated": now,
+        "downloadCount": payload.get("downloadCount", 0),
+        "viewCount": payload.get("viewCount", 0),
+        "qualityScore": payload.get("qualityScore", 0),
+        "status": payload.get("status", "pending"),
+        "metadata": _client_metadata(payload.get("metadata", {})),
+        "version": payload.get("version", "1.0"),
+        "isPublic": payload.get("isPublic", True),
+        "previewData": payload.get("previewData"),
+    }
+
+
+def _imported_line(payload: Any, now: str) -> Dict[str, Any]:
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Each line must be a JSON object")
+    if "id" in payload and (not isinstance(payload["id"], str) or not payload["id"]):
+        raise HTTPException(status_code=400, detail="Dataset id must be a non-empty string")
+    if payload.get("deleted") is True:
+        # A tombstone from an incremental export.
+        if "id" not in payload:
+            raise HTTPException(status_code=400, detail="Deleted entries need an id")
+        return {"id": payload["id"], "deleted": True}
+    # _new_dataset type-checks every known field; defaults fill in what the
+    # harvest omits and everything else it supplies is kept as is.
+    dataset = {**_new_dataset(payload, now), **payload}
+    dataset["metadata"] = _client_metadata(dataset.get("metadata"))
+    return dataset
+
+
+def _batch_items(payload: Dict[str, Any], field: str) -> List[Any]:
+    items = payload.get(field)
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail=f"'{field}' must be a non-empty list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} items per batch")
+    return items
+
+
+def _import_batch(batch: List[Dict[str, Any]], summary: Dict[str, Any], now: str) -> None:
+    # An export lists live records before tombstones and never both for one id,
+    # so applying a batch's upserts before its deletions preserves its meaning.
+    deleted = [item["id"] for item in batch if item.get("deleted") is True]
+    replaced = catalog.upsert_many([item for item in batch if item.get("deleted") is not True])
+    summary["deleted"] += len(catalog.delete_many(deleted, now))
+    created = sum(1 for previous in replaced.values() if previous is None)
+    summary["created"] += created
+    summary["updated"] += len(replaced) - created
 
 
 _ensure_storage()
 
+catalog: CatalogStore = open_catalog(DATA_DIR, CATALOG_BACKEND)
+search_index = SearchIndex()
+catalog_index = CatalogIndex()
+catalog.subscribe(search_index)
+catalog.subscribe(catalog_index)
+counters = CounterBuffer(catalog, interval=COUNTER_FLUSH_INTERVAL, publish_interval=COUNTER_PUBLISH_INTERVAL)
+uploads = UploadStore(FILES_DIR)
+response_cache = ResponseCache()
+ingest = IngestQueue(catalog, _resolve_dataset_file, ROW_INDEX_DIR, COLUMNAR_DIR, workers=INGEST_WORKERS)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    counters.start()
+    yield
+    ingest.shutdown()
+    counters.stop()
+    catalog.close()
+
+
 app = FastAPI(
     title="InnoCivic API",
     description="Minimal backend for the InnoCivic civic data hub.",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -64,6 +308,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
@@ -79,148 +324,278 @@ async def health_check() -> Dict[str, Any]:
     }
 
 
-@app.get("/api/categories")
-def list_categories() -> Dict[str, Any]:
-    datasets = _load_datasets()
-    buckets: Dict[str, Dict[str, Any]] = {}
+@app.get("/api/metrics")
+async def metrics() -> Response:
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    for dataset in datasets:
-        category = dataset.get("category", {})
-        category_id = category.get("id", "uncategorized")
 
-        if category_id not in buckets:
-            buckets[category_id] = {
-                "id": category_id,
-                "name": category.get("name", "Uncategorized"),
-                "description": category.get("description", ""),
-                "icon": category.get("icon"),
-                "datasetCount": 0,
-            }
+@app.get("/api/categories")
+def list_categories(request: Request) -> Response:
+    def build() -> Dict[str, Any]:
+        buckets = catalog_index.categories()
 
-        buckets[category_id]["datasetCount"] += 1
+        return {
+            "success": True,
+            "data": buckets,
+            "total": len(buckets),
+        }
 
-    return {
-        "success": True,
-        "data": list(buckets.values()),
-        "total": len(buckets),
-    }
+    return _cached_json(request, ("categories",), build)
 
 
 @app.get("/api/datasets")
 def list_datasets(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(12, ge=1, le=100),
     search: Optional[str] = Query(default=None),
     category: Optional[str] = Query(default=None),
     format: Optional[str] = Query(default=None),
     tag: Optional[str] = Query(default=None),
-) -> Dict[str, Any]:
-    datasets = _load_datasets()
-
-    def matches(dataset: Dict[str, Any]) -> bool:
-        if search:
-            needle = search.lower()
-            haystack = " ".join(
-                [
-                    dataset.get("title", ""),
-                    dataset.get("description", ""),
-                    " ".join(dataset.get("tags", [])),
-                ]
-            ).lower()
-            if needle not in haystack:
-                return False
-        if category:
-            category_id = (dataset.get("category") or {}).get("id")
-            if category_id != category:
-                return False
-        if format and dataset.get("format") != format:
-            return False
-        if tag and tag not in dataset.get("tags", []):
-            return False
-        return True
-
-    filtered = [dataset for dataset in datasets if matches(dataset)]
-    filtered.sort(key=lambda item: item.get("uploadedAt", ""), reverse=True)
-
-    total = len(filtered)
-    start = (page - 1) * limit
-    end = start + limit
-    slice_ = filtered[start:end]
+    status: Optional[str] = Query(default=None),
+    isPublic: Optional[bool] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+) -> Response:
+    if sort is None:
+        sort = "relevance" if search else "recent"
+    if sort not in SORTS and not (sort == "relevance" and search):
+        raise HTTPException(status_code=400, detail=f"Unsupported sort '{sort}'")
+
+    key = (
+        "datasets",
+        page,
+        limit,
+        search.strip().casefold() if search else None,
+        category,
+        format,
+        tag,
+        status,
+        isPublic,
+        sort,
+        cursor,
+    )
+
+    def build() -> Dict[str, Any]:
+        ranked = [dataset_id for dataset_id, _ in search_index.search(search)] if search else None
+        filters = {"category": category, "format": format, "tag": tag, "status": status, "isPublic": isPublic}
+
+        try:
+            result = catalog_index.query(sort, filters, (page - 1) * limit, limit, cursor=cursor, ranked=ranked)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        total = result["total"]
+        slice_ = [catalog.get(dataset_id) for dataset_id in result["ids"]]
+
+        return {
+            "success": True,
+            "data": [dataset for dataset in slice_ if dataset is not None],
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "totalPages": (total + limit - 1) // limit if total else 0,
+                "nextCursor": result["nextCursor"],
+            },
+            "facets": result["facets"],
+        }
+
+    return _cached_json(request, key, build)
+
+
+@app.get("/api/datasets/export")
+def export_datasets(since: Optional[str] = Query(default=None)) -> StreamingResponse:
+    cutoff = _parse_timestamp(since) if since is not None else None
+    if since is not None and cutoff is None:
+        raise HTTPException(status_code=400, detail="'since' must be an ISO 8601 timestamp")
+
+    # Records are replaced, never mutated, so this list of references is a
+    # consistent snapshot; each one is serialized only as it is sent.
+    snapshot = catalog.all()
+    tombstones = catalog.tombstones() if cutoff is not None else {}
+    version = catalog.version
+
+    def lines() -> Iterator[bytes]:
+        chunk: List[bytes] = []
+        for dataset in snapshot:
+            if cutoff is not None:
+                updated = _parse_timestamp(dataset.get("lastUpdated"))
+                # Records without a readable timestamp are included rather than silently dropped.
+                if updated is not None and updated < cutoff:
+                    continue
+            chunk.append(dumps(dataset))
+            if len(chunk) == IMPORT_BATCH_SIZE:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        for dataset_id, deleted_at in tombstones.items():
+            deleted = _parse_timestamp(deleted_at)
+            if deleted is not None and deleted < cutoff:
+                continue
+            chunk.append(dumps({"id": dataset_id, "deleted": True, "deletedAt": deleted_at}))
+            if len(chunk) == IMPORT_BATCH_SIZE:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Catalog-Version": str(version), "Cache-Control": "no-store"},
+    )
+
+
+@app.post("/api/datasets/import")
+async def import_datasets(request: Request) -> Dict[str, Any]:
+    now = _utc_now()
+    summary: Dict[str, Any] = {"created": 0, "updated": 0, "deleted": 0, "failed": 0, "errors": []}
+    batch: List[Dict[str, Any]] = []
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes) -> None:
+        try:
+            batch.append(_imported_line(json.loads(line), now))
+        except (ValueError, RecursionError, HTTPException) as exc:
+            summary["failed"] += 1
+            if len(summary["errors"]) < MAX_IMPORT_ERRORS:
+                message = exc.detail if isinstance(exc, HTTPException) else "Invalid JSON"
+                summary["errors"].append({"line": line_number, "error": message})
+
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        if len(buffer) > MAX_IMPORT_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Line {line_number + 1} exceeds {MAX_IMPORT_LINE_BYTES} bytes")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                parse(line)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await run_in_threadpool(_import_batch, batch[:], summary, now)
+                batch.clear()
+    if buffer.strip():
+        line_number += 1
+        parse(buffer)
+    if batch:
+        await run_in_threadpool(_import_batch, batch, summary, now)
+
+    return {"success": True, "message": "Datasets imported", "data": {**summary, "lines": line_number}}
+
+
+@app.post("/api/datasets/batch/get")
+def get_datasets_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    ids = _batch_items(payload, "ids")
+    found = []
+    missing = []
+    for dataset_id in ids:
+        dataset = catalog.get(dataset_id) if isinstance(dataset_id, str) else None
+        if dataset is None:
+            missing.append(dataset_id)
+        else:
+            found.append(dataset)
+    return {"success": True, "data": found, "missing": missing}
+
+
+@app.post("/api/datasets/batch", status_code=201)
+def create_datasets_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    now = _utc_now()
+    datasets = []
+    for position, item in enumerate(_batch_items(payload, "datasets")):
+        if not isinstance(item, dict):
+            raise HTTPException(status_code=400, detail=f"Each dataset must be an object (item {position})")
+        try:
+            datasets.append(_new_dataset(item, now))
+        except HTTPException as exc:
+            raise HTTPException(status_code=400, detail=f"{exc.detail} (item {position})")
+
+    catalog.insert_many(datasets)
+    jobs = [_schedule_ingest(dataset) for dataset in datasets]
 
     return {
         "success": True,
-        "data": slice_,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "totalPages": (total + limit - 1) // limit if total else 0,
-        },
+        "message": f"{len(datasets)} datasets created",
+        "data": datasets,
+        "ingestJobs": jobs,
     }
 
 
-@app.get("/api/datasets/{dataset_id}")
-def get_dataset(dataset_id: str) -> Dict[str, Any]:
-    datasets = _load_datasets()
-    dataset = _find_dataset(datasets, dataset_id)
-    return {"success": True, "data": dataset}
+@app.patch("/api/datasets/batch")
+def update_datasets_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    changes: Dict[str, Dict[str, Any]] = {}
+    for position, item in enumerate(_batch_items(payload, "datasets")):
+        if not isinstance(item, dict) or not isinstance(item.get("id"), str):
+            raise HTTPException(status_code=400, detail=f"Dataset id is required (item {position})")
+        try:
+            _check_fields(item)
+        except HTTPException as exc:
+            raise HTTPException(status_code=400, detail=f"{exc.detail} (item {position})")
+        changes.setdefault(item["id"], {}).update({key: value for key, value in item.items() if key != "id"})
 
+    missing = [dataset_id for dataset_id in changes if dataset_id not in catalog]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Datasets not found: {', '.join(missing)}")
 
-@app.post("/api/datasets", status_code=201)
-def create_dataset(payload: Dict[str, Any]) -> Dict[str, Any]:
-    datasets = _load_datasets()
+    now = _utc_now()
+    previous = {dataset_id: catalog.get(dataset_id) for dataset_id in changes}
 
-    if not payload.get("title"):
-        raise HTTPException(status_code=400, detail="Title is required")
+    def updater(updates: Dict[str, Any]) -> Callable[[Dict[str, Any]], None]:
+        def mutate(dataset: Dict[str, Any]) -> None:
+            _apply_updates(dataset, updates)
+            dataset["lastUpdated"] = now
 
-    dataset_id = str(uuid4())
-    now = datetime.utcnow().isoformat() + "Z"
+        return mutate
 
-    dataset = {
-        "id": dataset_id,
-        "title": payload.get("title"),
-        "description": payload.get("description", ""),
-        "category": payload.get("category"),
-        "tags": payload.get("tags", []),
-        "format": payload.get("format", "CSV"),
-        "fileUrl": payload.get("fileUrl"),
-        "fileSize": payload.get("fileSize", 0),
-        "source": payload.get("source"),
-        "license": payload.get("license"),
-        "geographicCoverage": payload.get("geographicCoverage"),
-        "timePeriod": payload.get("timePeriod"),
-        "uploadedBy": payload.get("uploadedBy"),
-        "uploadedAt": now,
-        "lastUpdated": now,
-        "downloadCount": payload.get("downloadCount", 0),
-        "viewCount": payload.get("viewCount", 0),
-        "qualityScore": payload.get("qualityScore", 0),
-        "status": payload.get("status", "pending"),
-        "metadata": payload.get("metadata", {}),
-        "version": payload.get("version", "1.0"),
-        "isPublic": payload.get("isPublic", True),
-        "previewData": payload.get("previewData"),
+    updated = catalog.update_many({dataset_id: updater(updates) for dataset_id, updates in changes.items()})
+    for dataset_id, dataset in updated.items():
+        old = previous.get(dataset_id)
+        if old is not None and dataset.get("fileUrl") != old.get("fileUrl"):
+            _schedule_ingest(dataset)
+
+    return {
+        "success": True,
+        "message": f"{len(updated)} datasets updated",
+        "data": [updated[dataset_id] for dataset_id in changes if dataset_id in updated],
     }
 
-    datasets.append(dataset)
-    _save_datasets(datasets)
+
+@app.get("/api/datasets/{dataset_id}")
+def get_dataset(dataset_id: str, request: Request) -> Response:
+    _find_dataset(dataset_id)
+    counters.increment(dataset_id, "viewCount")
+    return _cached_json(request, ("dataset", dataset_id), lambda: {"success": True, "data": _find_dataset(dataset_id)})
+
+
+@app.post("/api/datasets", status_code=201)
+def create_dataset(payload: Dict[str, Any]) -> Dict[str, Any]:
+    dataset = _new_dataset(payload, _utc_now())
+    catalog.insert(dataset)
+    job = _schedule_ingest(dataset)
 
     return {
         "success": True,
         "message": "Dataset created",
         "data": dataset,
+        "ingestJob": job,
     }
 
 
 @app.patch("/api/datasets/{dataset_id}")
 def update_dataset(dataset_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    datasets = _load_datasets()
-    dataset = _find_dataset(datasets, dataset_id)
+    _check_fields(payload)
 
-    _apply_updates(dataset, payload)
-    dataset["lastUpdated"] = datetime.utcnow().isoformat() + "Z"
+    def mutate(dataset: Dict[str, Any]) -> None:
+        _apply_updates(dataset, payload)
+        dataset["lastUpdated"] = _utc_now()
 
-    _save_datasets(datasets)
+    previous = _find_dataset(dataset_id)
+    dataset = catalog.update(dataset_id, mutate)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if dataset.get("fileUrl") != previous.get("fileUrl"):
+        _schedule_ingest(dataset)
 
     return {
         "success": True,
@@ -231,37 +606,143 @@ def update_dataset(dataset_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
 
 @app.delete("/api/datasets/{dataset_id}", status_code=204)
 def delete_dataset(dataset_id: str) -> None:
-    datasets = _load_datasets()
-    remaining = [dataset for dataset in datasets if dataset["id"] != dataset_id]
-
-    if len(remaining) == len(datasets):
+    if catalog.delete(dataset_id, _utc_now()) is None:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    _save_datasets(remaining)
-
 
-@app.get("/api/datasets/{dataset_id}/download")
-def download_dataset(dataset_id: str) -> FileResponse:
-    datasets = _load_datasets()
-    dataset = _find_dataset(datasets, dataset_id)
-    file_url = dataset.get("fileUrl")
-
-    if not file_url:
-        raise HTTPException(status_code=404, detail="Dataset file missing")
-
-    relative_part = file_url.lstrip("/datasets/")
-    candidate_path = os.path.realpath(os.path.join(FILES_DIR, relative_part))
-    if not candidate_path.startswith(os.path.realpath(FILES_DIR)):
-        raise HTTPException(status_code=400, detail="Invalid dataset file location")
+@app.get("/api/datasets/{dataset_id}/ingest")
+def get_ingest_status(dataset_id: str) -> Dict[str, Any]:
+    _find_dataset(dataset_id)
+    job = ingest.latest_for(dataset_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No ingest job for dataset")
+    return {"success": True, "data": job}
+
+
+@app.post("/api/datasets/{dataset_id}/ingest", status_code=202)
+def start_ingest(dataset_id: str) -> Dict[str, Any]:
+    dataset = _find_dataset(dataset_id)
+    if not ingest.supports(dataset):
+        raise HTTPException(status_code=415, detail="Dataset format cannot be profiled")
+    job = ingest.submit(dataset)
+    return {"success": True, "message": "Ingest started", "data": job}
+
+
+@app.get("/api/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: str) -> Dict[str, Any]:
+    job = ingest.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return {"success": True, "data": job}
+
+
+@app.get("/api/datasets/{dataset_id}/rows")
+def get_dataset_rows(
+    dataset_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    columns: Optional[str] = Query(default=None),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+) -> Response:
+    dataset = _find_dataset(dataset_id)
+    candidate_path = _resolve_dataset_file(dataset)
+    metadata = _ingest_metadata(dataset)
+    index = load_row_index(ROW_INDEX_DIR, metadata.get("sha256")) if metadata.get("rowIndexed") is True else None
+    if index is None:
+        raise HTTPException(status_code=409, detail="Row index not available for dataset")
+
+    selected = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+    unknown = [name for name in selected or [] if name not in index["headers"]]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+
+    try:
+        rows = list(read_rows(candidate_path, index, offset, limit, selected))
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Row index is out of date; re-run ingest")
+
+    if format == "ndjson":
+        lines = (json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        return StreamingResponse(lines, media_type="application/x-ndjson", headers={"X-Total-Rows": str(index["rows"])})
+
+    return JSONResponse(
+        {
+            "success": True,
+            "data": rows,
+            "columns": selected or index["headers"],
+            "pagination": {"offset": offset, "limit": limit, "total": index["rows"]},
+        }
+    )
+
+
+@app.get("/api/datasets/{dataset_id}/aggregate")
+def aggregate_dataset(
+    dataset_id: str,
+    groupBy: Optional[str] = Query(default=None),
+    agg: str = Query("count"),
+    value: Optional[str] = Query(default=None),
+    filter: List[str] = Query(default=[]),
+    bin: Optional[str] = Query(default=None),
+    bins: int = Query(20, ge=1, le=500),
+    interval: Optional[str] = Query(default=None),
+    top: Optional[int] = Query(default=None, ge=1, le=1000),
+) -> Dict[str, Any]:
+    dataset = _find_dataset(dataset_id)
+    metadata = _ingest_metadata(dataset)
+    table = open_table(COLUMNAR_DIR, metadata.get("sha256")) if metadata.get("columnar") is True else None
+    if table is None:
+        raise HTTPException(status_code=409, detail="Columnar cache not available for dataset")
+
+    try:
+        result = aggregate(
+            table,
+            group_by=groupBy,
+            agg=agg,
+            value=value,
+            filters=filter,
+            bin_column=bin,
+            bins=bins,
+            interval=interval,
+            top=top,
+        )
+    except AggregateError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    if not os.path.exists(candidate_path):
-        raise HTTPException(status_code=404, detail="Dataset file not found")
+    return {"success": True, "data": result}
 
-    dataset["downloadCount"] = dataset.get("downloadCount", 0) + 1
-    dataset["lastUpdated"] = datetime.utcnow().isoformat() + "Z"
-    _save_datasets(datasets)
 
-    return FileResponse(candidate_path, filename=os.path.basename(candidate_path))
+@app.get("/api/datasets/{dataset_id}/download")
+def download_dataset(dataset_id: str, request: Request) -> Response:
+    dataset = _find_dataset(dataset_id)
+    candidate_path = _resolve_dataset_file(dataset)
+
+    # Ingest already hashed the file; stored files are content-addressed and
+    # never rewritten in place, so its digest stays valid for this fileUrl.
+    metadata = dataset.get("metadata")
+    stored_digest = metadata.get("sha256") if isinstance(metadata, dict) else None
+    digest = stored_digest if is_sha256(stored_digest) else file_digest(candidate_path)
+    etag = f'"{digest}"'
+    cache_control = "public, max-age=300" if dataset.get("isPublic", True) else "private, no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+    variant_etags = [etag] + [f'"{digest}-{encoding}"' for encoding in ("gzip", "zstd")]
+    if etag_matches(request.headers.get("if-none-match"), variant_etags):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if not range_header or range_header.replace(" ", "").startswith("bytes=0-"):
+        counters.increment(dataset_id, "downloadCount")
+
+    filename = os.path.basename(candidate_path)
+    encoding = None if range_header else negotiate_encoding(request.headers.get("accept-encoding"), candidate_path)
+    if encoding:
+        variant_path = compressed_variant(candidate_path, digest, encoding, VARIANTS_DIR)
+        if variant_path:
+            headers.update({"ETag": f'"{digest}-{encoding}"', "Content-Encoding": encoding})
+            media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            return FileResponse(variant_path, headers=headers, media_type=media_type, filename=filename)
+
+    return FileResponse(candidate_path, headers=headers, filename=filename)
 
 
 @app.post("/upload/{source}/{subject}")
@@ -270,48 +751,64 @@ async def upload_dataset(
     subject: str,
     file: UploadFile,
 ) -> Dict[str, Any]:
-    filename = os.path.basename(file.filename or "")
-    if not filename:
-        raise HTTPException(status_code=400, detail="Filename is required")
-
-    ext = os.path.splitext(filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported extension '{ext}'. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}",
-        )
+    filename = _validate_filename(file.filename)
 
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-    folder = os.path.join(FILES_DIR, subject, source, today)
-    os.makedirs(folder, exist_ok=True)
-
-    full_path = os.path.join(folder, filename)
-    if os.path.exists(full_path):
-        raise HTTPException(status_code=409, detail="Dataset file already exists")
-
-    size_limit = MAX_FILE_SIZE_MB * 1024 * 1024
-    written = 0
-
-    with open(full_path, "wb") as handle:
+    async def chunks() -> AsyncIterator[bytes]:
         while True:
             chunk = await file.read(1024 * 1024)
             if not chunk:
                 break
-            written += len(chunk)
-            if written > size_limit:
-                try:
-                    os.remove(full_path)
-                except FileNotFoundError:
-                    pass
-                raise HTTPException(status_code=413, detail="File too large")
-            handle.write(chunk)
+            yield chunk
 
-    relative_path = f"/datasets/{subject}/{source}/{today}/{filename}"
+    stored = await uploads.save_stream(chunks(), source, subject, filename, MAX_FILE_SIZE_MB * 1024 * 1024)
 
     return {
         "success": True,
         "message": "Dataset uploaded",
-        "fileUrl": relative_path,
-        "fileSize": written,
+        **stored,
         "contentType": file.content_type,
-    }
\ No newline at end of file
+    }
+
+
+@app.post("/api/uploads", status_code=201)
+async def create_upload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    source = payload.get("source")
+    subject = payload.get("subject")
+    if not source or not subject:
+        raise HTTPException(status_code=400, detail="Source and subject are required")
+    filename = _validate_filename(payload.get("filename"))
+    size = payload.get("size")
+    if size is not None and (not isinstance(size, int) or size < 0):
+        raise HTTPException(status_code=400, detail="Size must be a non-negative integer")
+
+    session = await uploads.create_session(
+        source, subject, filename, size, MAX_RESUMABLE_FILE_SIZE_MB * 1024 * 1024
+    )
+    return {"success": True, "message": "Upload started", "data": session}
+
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str) -> Dict[str, Any]:
+    session = await uploads.get_session(upload_id)
+    return {"success": True, "data": session}
+
+
+@app.put("/api/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request, offset: int = Query(..., ge=0)) -> Dict[str, Any]:
+    session = await uploads.append(upload_id, offset, request.stream())
+    return {"success": True, "data": session}
+
+
+@app.post("/api/uploads/{upload_id}/commit")
+async def commit_upload(upload_id: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    stored = await uploads.commit(upload_id, (payload or {}).get("sha256"))
+    return {
+        "success": True,
+        "message": "Dataset uploaded",
+        **stored,
+    }
+
+
+@app.delete("/api/uploads/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str) -> None:
+    await uploads.abort(upload_id)
@@ -0,0 +1,153 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+class Registry:
+    """Minimal thread-safe Prometheus-style registry of counters, gauges and histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def add_gauge(self, name: str, amount: float, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then the running sum and total count.
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+            index = bisect_left(LATENCY_BUCKETS, value)
+            if index < len(LATENCY_BUCKETS):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    self._header(lines, name, kind)
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, state in sorted(series.items()):
+                    cumulative = 0.0
+                    for bound, count in zip(LATENCY_BUCKETS, state):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative:g}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {state[-1]:g}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {state[-1]:g}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        _, help_text = self._help.get(name, (kind, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+registry = Registry()
+registry.describe("innocivic_http_requests_total", "counter", "HTTP requests by method, route and status.")
+registry.describe("innocivic_http_request_duration_seconds", "histogram", "HTTP request latency by method and route.")
+registry.describe("innocivic_http_requests_in_flight", "gauge", "HTTP requests currently being served.")
+registry.describe("innocivic_http_request_bytes_total", "counter", "Request body bytes received by route.")
+registry.describe("innocivic_http_response_bytes_total", "counter", "Response body bytes sent by route.")
+registry.describe("innocivic_operation_duration_seconds", "histogram", "Time spent in catalog persistence and file I/O.")
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe("innocivic_operation_duration_seconds", time.perf_counter() - started, operation=operation)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status, in-flight requests and body sizes."""
+
+    def __init__(self, app: Callable[..., Awaitable[None]]) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        counts = {"in": 0, "out": 0}
+        status = {"code": 500}
+
+        async def counting_receive() -> Dict[str, Any]:
+            message = await receive()
+            if message["type"] == "http.request":
+                counts["in"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                counts["out"] += len(message.get("body", b""))
+            await send(message)
+
+        registry.add_gauge("innocivic_http_requests_in_flight", 1)
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            registry.add_gauge("innocivic_http_requests_in_flight", -1)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            registry.observe(
+                "innocivic_http_request_duration_seconds", time.perf_counter() - started, method=method, route=path
+            )
+            registry.inc("innocivic_http_requests_total", method=method, route=path, status=str(status["code"]))
+            registry.inc("innocivic_http_request_bytes_total", counts["in"], route=path)
+            registry.inc("innocivic_http_response_bytes_total", counts["out"], route=path)
@@ -0,0 +1,478 @@
+import codecs
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from datetime import datetime
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+try:
+    import openpyxl
+except ImportError:  # optional: XLSX files are skipped without it
+    openpyxl = None
+
+
+PROFILED_EXTENSIONS = {".csv", ".tsv", ".json"}
+if openpyxl is not None:
+    PROFILED_EXTENSIONS.add(".xlsx")
+PREVIEW_ROWS = 20
+PREVIEW_CELL_CHARS = 500
+SAMPLE_BYTES = 64 * 1024
+READ_CHUNK = 1024 * 1024
+TYPE_MAJORITY = 0.95
+
+_INTEGER_RE = re.compile(r"^[+-]?\d+$")
+_NUMBER_RE = re.compile(r"^[+-]?(\d+([.,]\d*)?|[.,]\d+)([eE][+-]?\d+)?$")
+_DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2}|\d{2}\.\d{2}\.\d{4})$")
+_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+_BOOLEANS = {"true", "false", "yes", "no", "да", "нет"}
+_NULLS = {"", "null", "none", "nan", "n/a", "na", "-"}
+
+
+class HyperLogLog:
+    """Fixed-size distinct-count estimator (2**p one-byte registers)."""
+
+    def __init__(self, p: int = 12) -> None:
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = h >> (64 - self.p)
+        rest = (h << self.p) & ((1 << 64) - 1)
+        rank = 1
+        while rank <= 64 - self.p and not rest & (1 << 63):
+            rank += 1
+            rest <<= 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.m and zeros:
+            return int(round(self.m * math.log(self.m / zeros)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """Exact min/max/mean plus quantiles from a fixed-size reservoir sample."""
+
+    def __init__(self, size: int = 2048, seed: int = 0) -> None:
+        self.size = size
+        self.sample: List[float] = []
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._random = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.sample) < self.size:
+            self.sample.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.size:
+                self.sample[slot] = value
+
+    def quantiles(self, points: Tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> Dict[str, float]:
+        if not self.sample:
+            return {}
+        ordered = sorted(self.sample)
+        return {f"p{int(point * 100)}": ordered[min(int(point * len(ordered)), len(ordered) - 1)] for point in points}
+
+
+def parse_number(text: str) -> Optional[float]:
+    text = text.replace(" ", "").replace("\u00a0", "")
+    if not _NUMBER_RE.match(text):
+        return None
+    if "," in text and "." not in text:
+        text = text.replace(",", ".")
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def parse_date(text: str) -> Optional[str]:
+    """ISO ``YYYY-MM-DD[THH:MM:SS]`` form of a date/datetime string, if it is one."""
+    try:
+        if _DATE_RE.match(text):
+            if "." in text:
+                return datetime.strptime(text, "%d.%m.%Y").strftime("%Y-%m-%d")
+            return datetime.strptime(text, "%Y-%m-%d").strftime("%Y-%m-%d")
+        if _DATETIME_RE.match(text):
+            return datetime.fromisoformat(text.replace("Z", "+00:00")).strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+    return None
+
+
+def classify(value: Any) -> Tuple[str, Any]:
+    """Return ``(type, normalized value)`` for one cell; type ``null`` for blanks."""
+    if value is None:
+        return "null", None
+    if isinstance(value, bool):
+        return "boolean", value
+    if isinstance(value, int):
+        return "integer", value
+    if isinstance(value, float):
+        return ("number", value) if math.isfinite(value) else ("null", None)
+    if isinstance(value, datetime):
+        return "datetime", value.strftime("%Y-%m-%dT%H:%M:%S")
+    if isinstance(value, (dict, list)):
+        return "string", json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    text = str(value).strip()
+    lowered = text.lower()
+    if lowered in _NULLS:
+        return "null", None
+    if _INTEGER_RE.match(text):
+        return "integer", int(text)
+    number = parse_number(text)
+    if number is not None:
+        return "number", number
+    if lowered in _BOOLEANS:
+        return "boolean", lowered in ("true", "yes", "да")
+    date = parse_date(text)
+    if date is not None:
+        return ("datetime" if "T" in date else "date"), date
+    return "string", text
+
+
+def infer_type(type_counts: Dict[str, int]) -> Tuple[str, int]:
+    """Dominant column type and how many non-null cells conform to it."""
+    non_null = sum(type_counts.values())
+    if not non_null:
+        return "string", 0
+    integers = type_counts.get("integer", 0)
+    numeric = integers + type_counts.get("number", 0)
+    temporal = type_counts.get("date", 0) + type_counts.get("datetime", 0)
+    if integers >= TYPE_MAJORITY * non_null:
+        return "integer", integers
+    if numeric >= TYPE_MAJORITY * non_null:
+        return "number", numeric
+    if temporal >= TYPE_MAJORITY * non_null:
+        return ("datetime" if type_counts.get("datetime") else "date"), temporal
+    if type_counts.get("boolean", 0) >= TYPE_MAJORITY * non_null:
+        return "boolean", type_counts["boolean"]
+    return "string", non_null
+
+
+def detect_encoding(path: str) -> str:
+    with open(path, "rb") as handle:
+        sample = handle.read(SAMPLE_BYTES)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(sample)
+    except UnicodeDecodeError:
+        return "cp1251"
+    return "utf-8-sig"
+
+
+def detect_delimiter(path: str, encoding: str) -> str:
+    if path.lower().endswith(".tsv"):
+        return "\t"
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as handle:
+        sample = handle.read(SAMPLE_BYTES)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def unique_headers(raw: List[Any]) -> List[str]:
+    headers: List[str] = []
+    seen: Dict[str, int] = {}
+    for position, name in enumerate(raw):
+        name = str(name).strip() if name is not None else ""
+        name = name or f"column_{position + 1}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        headers.append(name)
+    return headers
+
+
+def _iter_csv(path: str) -> Iterator[Dict[str, Any]]:
+    encoding = detect_encoding(path)
+    delimiter = detect_delimiter(path, encoding)
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as handle:
+        reader = csv.reader(handle, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        headers = unique_headers(header)
+        for row in reader:
+            if not row:
+                continue
+            yield {name: (row[index] if index < len(row) else None) for index, name in enumerate(headers)}
+
+
+def _iter_json_values(handle: IO[str]) -> Iterator[Any]:
+    """Stream the records of a JSON file.
+
+    Supported layouts are a top-level array, NDJSON, and a top-level object
+    wrapping the records in an array member (the first such member is used).
+    """
+    decoder = json.JSONDecoder()
+    buffer = handle.read(READ_CHUNK).lstrip("\ufeff").lstrip()
+    if not buffer:
+        return
+    if buffer[0] == "[":
+        yield from _array_items(decoder, buffer, 1, handle)
+    elif buffer[0] == "{" and not _looks_like_ndjson(buffer):
+        yield from _object_array_items(decoder, buffer, 1, handle)
+    else:
+        yield from _ndjson_lines(buffer, handle)
+
+
+def _looks_like_ndjson(buffer: str) -> bool:
+    """True when the first line is a complete JSON value followed by more lines."""
+    head, newline, rest = buffer.partition("\n")
+    if not newline or not rest.strip():
+        return False
+    try:
+        json.loads(head)
+    except ValueError:
+        return False
+    return True
+
+
+def _skip(buffer: str, position: int, handle: IO[str], chars: str) -> Tuple[str, int]:
+    """Advance past ``chars``, reading more as needed; returns ("", 0) at end of file."""
+    while True:
+        while position < len(buffer) and buffer[position] in chars:
+            position += 1
+        if position < len(buffer):
+            return buffer, position
+        more = handle.read(READ_CHUNK)
+        if not more:
+            return "", 0
+        buffer, position = more, 0
+
+
+def _decode(decoder: json.JSONDecoder, buffer: str, position: int, handle: IO[str]) -> Tuple[Any, str, int]:
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            end = None
+        if end is not None and end < len(buffer):
+            return value, buffer, end
+        # Either the value is cut off or it ends exactly at the chunk
+        # boundary (a number may continue); read more and retry.
+        more = handle.read(READ_CHUNK)
+        if more:
+            buffer, position = buffer[position:] + more, 0
+            continue
+        if end is None:
+            raise ValueError("Truncated JSON")
+        return value, buffer, end
+
+
+def _array_items(decoder: json.JSONDecoder, buffer: str, position: int, handle: IO[str]) -> Iterator[Any]:
+    """Yield array items one by one; ``position`` is just past the opening bracket."""
+    while True:
+        buffer, position = _skip(buffer, position, handle, " \t\r\n,")
+        if not buffer:
+            raise ValueError("Truncated JSON array")
+        if buffer[position] == "]":
+            return
+        value, buffer, position = _decode(decoder, buffer, position, handle)
+        yield value
+
+
+def _object_array_items(decoder: json.JSONDecoder, buffer: str, position: int, handle: IO[str]) -> Iterator[Any]:
+    """Stream the first array member of a top-level object.
+
+    An object without array members is a record in its own right; anything
+    after it is read as further records (NDJSON with long lines).
+    """
+    members: Dict[str, Any] = {}
+    while True:
+        buffer, position = _skip(buffer, position, handle, " \t\r\n,")
+        if not buffer:
+            raise ValueError("Truncated JSON object")
+        if buffer[position] == "}":
+            yield members
+            position += 1
+            while True:
+                buffer, position = _skip(buffer, position, handle, " \t\r\n")
+                if not buffer:
+                    return
+                value, buffer, position = _decode(decoder, buffer, position, handle)
+                yield value
+        key, buffer, position = _decode(decoder, buffer, position, handle)
+        buffer, position = _skip(buffer, position, handle, " \t\r\n:")
+        if not isinstance(key, str) or not buffer:
+            raise ValueError("Unsupported JSON layout: expected an array of records, NDJSON or an object with an array member")
+        if buffer[position] == "[":
+            yield from _array_items(decoder, buffer, position + 1, handle)
+            return
+        members[key], buffer, position = _decode(decoder, buffer, position, handle)
+
+
+def _ndjson_lines(head: str, handle: IO[str]) -> Iterator[Any]:
+    pending = head
+    while True:
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        more = handle.read(READ_CHUNK)
+        if not more:
+            break
+        pending += more
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def _iter_json(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding=detect_encoding(path)) as handle:
+        for value in _iter_json_values(handle):
+            yield value if isinstance(value, dict) else {"value": value}
+
+
+def _iter_xlsx(path: str) -> Iterator[Dict[str, Any]]:
+    if openpyxl is None:
+        raise RuntimeError("XLSX profiling requires the openpyxl package")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        headers = unique_headers(list(header))
+        for row in rows:
+            if row is None or all(cell is None for cell in row):
+                continue
+            yield {name: (row[index] if index < len(row) else None) for index, name in enumerate(headers)}
+    finally:
+        workbook.close()
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".csv", ".tsv"):
+        return _iter_csv(path)
+    if ext == ".json":
+        return _iter_json(path)
+    if ext == ".xlsx":
+        return _iter_xlsx(path)
+    raise ValueError(f"Unsupported format '{ext}'")
+
+
+class ColumnProfile:
+    def __init__(self) -> None:
+        self.nulls = 0
+        self.type_counts: Dict[str, int] = {}
+        self.distinct = HyperLogLog()
+        self.numbers = QuantileSketch()
+        self.min_text: Optional[str] = None
+        self.max_text: Optional[str] = None
+
+    def add(self, value: Any) -> None:
+        kind, normalized = classify(value)
+        if kind == "null":
+            self.nulls += 1
+            return
+        self.type_counts[kind] = self.type_counts.get(kind, 0) + 1
+        if kind in ("integer", "number"):
+            self.numbers.add(float(normalized))
+            self.distinct.add(repr(float(normalized)))
+            return
+        text = str(normalized)
+        self.distinct.add(text)
+        if self.min_text is None or text < self.min_text:
+            self.min_text = text
+        if self.max_text is None or text > self.max_text:
+            self.max_text = text
+
+    def summary(self, row_count: int) -> Dict[str, Any]:
+        # Cells absent from a row (ragged CSV, sparse JSON) count as nulls.
+        non_null = sum(self.type_counts.values())
+        nulls = max(row_count - non_null, self.nulls)
+        column_type, conforming = infer_type(self.type_counts)
+        result: Dict[str, Any] = {
+            "type": column_type,
+            "nullCount": nulls,
+            "nullRate": round(nulls / row_count, 4) if row_count else 0.0,
+            "distinctEstimate": min(self.distinct.estimate(), non_null),
+            "typeConsistency": round(conforming / non_null, 4) if non_null else 1.0,
+        }
+        if column_type in ("integer", "number") and self.numbers.count:
+            result.update(
+                {
+                    "min": self.numbers.min,
+                    "max": self.numbers.max,
+                    "mean": self.numbers.total / self.numbers.count,
+                    "quantiles": self.numbers.quantiles(),
+                }
+            )
+        elif self.min_text is not None:
+            result.update({"min": self.min_text, "max": self.max_text})
+        return result
+
+
+def quality_score(columns: Dict[str, Dict[str, Any]], row_count: int, headers_generated: int) -> float:
+    """0–10 score from completeness, type consistency and header quality."""
+    if not columns or not row_count:
+        return 0.0
+    completeness = 1 - sum(stats["nullRate"] for stats in columns.values()) / len(columns)
+    consistency = sum(stats["typeConsistency"] for stats in columns.values()) / len(columns)
+    header_quality = 1 - headers_generated / len(columns)
+    return round(10 * (0.5 * completeness + 0.3 * consistency + 0.2 * header_quality), 1)
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (str, list, dict)):
+        # Preview cells are capped so one huge value cannot bloat the record.
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        if len(text) > PREVIEW_CELL_CHARS:
+            return text[:PREVIEW_CELL_CHARS] + "…"
+    return value
+
+
+def profile_file(path: str) -> Dict[str, Any]:
+    """Profile a CSV/TSV/JSON/XLSX file in one streaming pass with bounded memory."""
+    columns: Dict[str, ColumnProfile] = {}
+    preview: List[Dict[str, Any]] = []
+    row_count = 0
+
+    for record in iter_records(path):
+        row_count += 1
+        if len(preview) < PREVIEW_ROWS:
+            preview.append({key: _json_safe(value) for key, value in record.items()})
+        for name, value in record.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = ColumnProfile()
+            column.add(value)
+
+    stats = {name: column.summary(row_count) for name, column in columns.items()}
+    generated = sum(1 for name in columns if re.match(r"^column_\d+$", name))
+    return {
+        "previewData": preview,
+        "schema": [{"name": name, "type": column_stats["type"]} for name, column_stats in stats.items()],
+        "rowCount": row_count,
+        "columnStats": stats,
+        "qualityScore": quality_score(stats, row_count, generated),
+    }
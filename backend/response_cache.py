@@ -0,0 +1,65 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except orjson.JSONEncodeError:
+            # orjson rejects some valid JSON, such as integers wider than 64 bits.
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.etag = 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class ResponseCache:
+    """Bounded LRU of serialized JSON bodies keyed by ``(query key, catalog version)``.
+
+    Entries for older versions are never requested again once the version
+    moves on and simply age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[Hashable, int], CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get((key, version))
+            if entry is not None:
+                self._entries.move_to_end((key, version))
+            return entry
+
+    def put(self, key: Hashable, version: int, payload: Dict[str, Any]) -> CachedResponse:
+        entry = CachedResponse(dumps(payload))
+        if len(entry.body) > self.max_bytes // 16:
+            return entry
+        with self._lock:
+            previous = self._entries.pop((key, version), None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[(key, version)] = entry
+            self._bytes += len(entry.body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+        return entry
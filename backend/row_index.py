@@ -0,0 +1,205 @@
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import profiler
+from delivery import is_sha256
+from metrics import timed
+
+
+INDEXED_EXTENSIONS = {".csv", ".tsv"}
+ROWS_PER_CHECKPOINT = 1000
+INDEX_CACHE_SIZE = 256
+# Bumped whenever record splitting changes, so older indexes are rebuilt by re-ingesting.
+INDEX_VERSION = 2
+QUOTE = ord('"')
+
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _record_end(buffer: Any, position: int, size: int, delimiter: int) -> int:
+    """Offset of the newline ending the CSV record at ``position`` (``size`` at EOF).
+
+    Follows the ``csv`` module: a quote opens a quoted field only at the start
+    of a record or right after ``delimiter``; elsewhere it is literal. Inside
+    a quoted field, newlines do not end the record and ``""`` is an escaped
+    quote.
+    """
+    record_start = position
+    in_quotes = False
+    while True:
+        if in_quotes:
+            quote = buffer.find(b'"', position, size)
+            if quote < 0:
+                return size
+            if quote + 1 < size and buffer[quote + 1] == QUOTE:
+                position = quote + 2
+                continue
+            in_quotes = False
+            position = quote + 1
+            continue
+        newline = buffer.find(b"\n", position, size)
+        limit = size if newline < 0 else newline
+        quote = buffer.find(b'"', position, limit)
+        while quote >= 0 and quote != record_start and buffer[quote - 1] != delimiter:
+            quote = buffer.find(b'"', quote + 1, limit)
+        if quote >= 0:
+            in_quotes = True
+            position = quote + 1
+            continue
+        return limit
+
+
+def iter_records(buffer: Any, position: int, size: int, delimiter: str = ",") -> Iterator[Tuple[int, int]]:
+    """Yield ``(start, end)`` byte spans of non-blank records from ``position``."""
+    separator = ord(delimiter)
+    while position < size:
+        end = _record_end(buffer, position, size, separator)
+        line_end = end - 1 if end > position and buffer[end - 1] == 13 else end
+        if line_end > position:
+            yield position, line_end
+        position = end + 1
+
+
+def _open_map(path: str) -> Tuple[Any, Any]:
+    handle = open(path, "rb")
+    try:
+        return handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped.
+        return handle, b""
+
+
+def build_row_index(path: str, every: int = ROWS_PER_CHECKPOINT) -> Dict[str, Any]:
+    """Sparse index holding the byte offset of every ``every``-th data row."""
+    encoding = profiler.detect_encoding(path)
+    delimiter = profiler.detect_delimiter(path, encoding)
+    handle, buffer = _open_map(path)
+    try:
+        size = len(buffer)
+        sha256 = hashlib.sha256(buffer).hexdigest()
+        records = iter_records(buffer, 0, size, delimiter)
+        header_span = next(records, None)
+        headers: List[str] = []
+        if header_span is not None:
+            header_text = bytes(buffer[header_span[0] : header_span[1]]).decode(encoding, errors="replace")
+            headers = profiler.unique_headers(next(csv.reader([header_text], delimiter=delimiter), []))
+
+        offsets: List[int] = []
+        rows = 0
+        for start, _ in records:
+            if rows % every == 0:
+                offsets.append(start)
+            rows += 1
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+        handle.close()
+
+    return {
+        "version": INDEX_VERSION,
+        "sha256": sha256,
+        "size": size,
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "headers": headers,
+        "rows": rows,
+        "every": every,
+        "offsets": offsets,
+    }
+
+
+def index_path(index_dir: str, sha256: str) -> str:
+    if not is_sha256(sha256):
+        raise ValueError("Invalid content digest")
+    return os.path.join(index_dir, sha256[:2], f"{sha256}.json")
+
+
+def write_row_index(index_dir: str, index: Dict[str, Any]) -> None:
+    path = index_path(index_dir, index["sha256"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+        json.dump(index, handle, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+
+
+def load_row_index(index_dir: str, sha256: str) -> Optional[Dict[str, Any]]:
+    if not is_sha256(sha256):
+        return None
+    with _cache_lock:
+        index = _cache.get(sha256)
+        if index is not None:
+            _cache.move_to_end(sha256)
+            return index
+    try:
+        with open(index_path(index_dir, sha256), "r", encoding="utf-8") as handle:
+            index = json.load(handle)
+    except FileNotFoundError:
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    with _cache_lock:
+        _cache[sha256] = index
+        while len(_cache) > INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def read_rows(
+    path: str,
+    index: Dict[str, Any],
+    offset: int,
+    limit: int,
+    columns: Optional[List[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield rows ``offset .. offset + limit`` as dicts restricted to ``columns``.
+
+    Seeks to the nearest checkpoint and skips at most ``every - 1`` records,
+    so the cost does not depend on how deep into the file the page is.
+    """
+    if offset >= index["rows"] or limit <= 0:
+        return
+    headers = index["headers"]
+    selected = [(headers.index(name), name) for name in columns] if columns else list(enumerate(headers))
+
+    with timed("file_read"):
+        text = _read_span(path, index, offset, limit)
+    if text is None:
+        return
+
+    reader = csv.reader(io.StringIO(text, newline=""), delimiter=index["delimiter"])
+    for row in reader:
+        if not row:
+            continue
+        yield {name: (row[position] if position < len(row) else None) for position, name in selected}
+
+
+def _read_span(path: str, index: Dict[str, Any], offset: int, limit: int) -> Optional[str]:
+    handle, buffer = _open_map(path)
+    try:
+        if len(buffer) != index["size"]:
+            raise ValueError("Row index does not match file")
+        checkpoint, skip = divmod(offset, index["every"])
+        records = iter_records(buffer, index["offsets"][checkpoint], len(buffer), index["delimiter"])
+        for _ in range(skip):
+            next(records, None)
+
+        spans = []
+        for span in records:
+            spans.append(span)
+            if len(spans) == limit:
+                break
+        if not spans:
+            return None
+        return bytes(buffer[spans[0][0] : spans[-1][1]]).decode(index["encoding"], errors="replace")
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+        handle.close()
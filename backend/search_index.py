@@ -0,0 +1,206 @@
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+CYRILLIC_RE = re.compile(r"[а-я]")
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "description": 1.0}
+MAX_PREFIX_EXPANSIONS = 64
+
+# Longest suffixes first so e.g. "ость" wins over "ть".
+_RU_SUFFIXES = sorted(
+    [
+        "иями", "ями", "ами", "ией", "иях", "ях", "ах", "ов", "ев", "ей", "ий", "ый", "ой", "ая", "яя", "ое", "ее",
+        "ые", "ие", "ых", "их", "ым", "им", "ом", "ем", "ую", "юю", "ого", "его", "ому", "ему", "ыми", "ими",
+        "ость", "ости", "ать", "ять", "еть", "ить", "ться", "ия", "ию", "ии", "а", "я", "о", "е", "ы", "и",
+        "у", "ю", "ь",
+    ],
+    key=len,
+    reverse=True,
+)
+_EN_SUFFIXES = ["ational", "ations", "ation", "ings", "ing", "ies", "ed", "es", "ly", "s"]
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return text.replace("ё", "е")
+
+
+# Catalog text reuses a small vocabulary, so most tokens are stemmed once.
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    if len(token) <= 3 or token.isdigit():
+        return token
+    suffixes = _RU_SUFFIXES if CYRILLIC_RE.search(token) else _EN_SUFFIXES
+    for suffix in suffixes:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            if suffix == "ies":
+                return token[: -len(suffix)] + "y"
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in TOKEN_RE.findall(normalize(text))]
+
+
+def _document_terms(dataset: Dict[str, Any]) -> Tuple[Counter, Set[str]]:
+    """Weighted stem counts plus the set of unstemmed tokens, for prefix matching."""
+    terms: Counter = Counter()
+    surfaces: Set[str] = set()
+    tags = dataset.get("tags")
+    fields = {
+        "title": dataset.get("title"),
+        "description": dataset.get("description"),
+        "tags": " ".join(tag for tag in tags if isinstance(tag, str)) if isinstance(tags, list) else "",
+    }
+    for field, text in fields.items():
+        if not isinstance(text, str):
+            # Malformed legacy values are skipped rather than failing the index.
+            continue
+        weight = FIELD_WEIGHTS[field]
+        for token in TOKEN_RE.findall(normalize(text)):
+            terms[stem(token)] += weight
+            surfaces.add(token)
+    return terms, surfaces
+
+
+class SearchIndex:
+    """Inverted index over title, description and tags with BM25 ranking.
+
+    Kept in sync with the catalog through ``CatalogStore.subscribe``; the last
+    query token is matched as a prefix to support type-ahead. Prefixes are
+    looked up among the unstemmed tokens as well as the stems, since a
+    partially typed word ("populat") is often longer than its stem ("popul").
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._total_length = 0.0
+        self._vocabulary: List[str] = []
+        self._doc_surfaces: Dict[str, Set[str]] = {}
+        self._surface_counts: Dict[str, int] = {}
+        self._surface_vocabulary: List[str] = []
+
+    def __call__(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            if old is not None:
+                self._remove(old["id"])
+            if new is not None:
+                self._add(new["id"], *_document_terms(new))
+
+    def load(self, datasets: List[Dict[str, Any]]) -> None:
+        """Replace the index contents with ``datasets``, sorting the vocabulary once at the end."""
+        with self._lock:
+            self._clear()
+            for dataset in datasets:
+                self._add(dataset["id"], *_document_terms(dataset), bulk=True)
+            self._vocabulary.sort()
+            self._surface_vocabulary.sort()
+
+    def _add(self, doc_id: str, terms: Counter, surfaces: Set[str], bulk: bool = False) -> None:
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if bulk:
+                    self._vocabulary.append(term)
+                else:
+                    insort(self._vocabulary, term)
+            postings[doc_id] = weight
+
+        self._doc_surfaces[doc_id] = surfaces
+        for surface in surfaces:
+            count = self._surface_counts.get(surface, 0)
+            if not count:
+                if bulk:
+                    self._surface_vocabulary.append(surface)
+                else:
+                    insort(self._surface_vocabulary, surface)
+            self._surface_counts[surface] = count + 1
+
+    def _remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+        for surface in self._doc_surfaces.pop(doc_id, ()):
+            count = self._surface_counts[surface] - 1
+            if count:
+                self._surface_counts[surface] = count
+            else:
+                del self._surface_counts[surface]
+                del self._surface_vocabulary[bisect_left(self._surface_vocabulary, surface)]
+
+    def _expand_prefix(self, token: str) -> List[str]:
+        expanded: Dict[str, None] = {}
+        for vocabulary, prefix, to_term in (
+            (self._vocabulary, stem(token), lambda term: term),
+            (self._surface_vocabulary, token, stem),
+        ):
+            start = bisect_left(vocabulary, prefix)
+            for entry in vocabulary[start : start + MAX_PREFIX_EXPANSIONS]:
+                if not entry.startswith(prefix):
+                    break
+                expanded[to_term(entry)] = None
+        return list(expanded)
+
+    def search(self, query: str) -> List[Tuple[str, float]]:
+        tokens = TOKEN_RE.findall(normalize(query))
+        if not tokens:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores: Dict[str, float] = {}
+            matched: Optional[Set[str]] = None
+            for position, token in enumerate(tokens):
+                if position == len(tokens) - 1:
+                    candidates = self._expand_prefix(token)
+                else:
+                    term = stem(token)
+                    candidates = [term] if term in self._postings else []
+
+                token_docs: Set[str] = set()
+                for candidate in candidates:
+                    postings = self._postings[candidate]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, tf in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                        token_docs.add(doc_id)
+
+                matched = token_docs if matched is None else matched & token_docs
+                if not matched:
+                    return []
+
+        return sorted(((doc_id, scores[doc_id]) for doc_id in matched), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import uuid4
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from metrics import timed
+
+
+CHUNK_SIZE = 1024 * 1024
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+
+def _write_chunk(handle: Any, hasher: Any, chunk: bytes) -> None:
+    with timed("file_write"):
+        handle.write(chunk)
+    hasher.update(chunk)
+
+
+def _write_only(handle: Any, chunk: bytes) -> None:
+    with timed("file_write"):
+        handle.write(chunk)
+
+
+def _hash_file(path: str) -> Any:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+class UploadStore:
+    """Content-addressed file storage with resumable upload sessions.
+
+    Bytes are stored once under ``<files_dir>/.objects/<aa>/<sha256>`` and
+    exposed at their familiar ``<subject>/<source>/<date>/<filename>`` paths as
+    hard links (copies where linking is not possible). All disk I/O runs in
+    the threadpool so large uploads do not block the event loop.
+    """
+
+    def __init__(self, files_dir: str) -> None:
+        self.files_dir = files_dir
+        self.objects_dir = os.path.join(files_dir, ".objects")
+        self.staging_dir = os.path.join(files_dir, ".uploads")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._hashers: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _alias_path(self, source: str, subject: str, filename: str) -> str:
+        for segment in (source, subject, filename):
+            # Each part must be a single plain path segment; dot-prefixed names
+            # are reserved for the object and staging folders.
+            if (
+                not isinstance(segment, str)
+                or not segment
+                or segment.startswith(".")
+                or os.path.basename(segment) != segment
+                or "\\" in segment
+            ):
+                raise HTTPException(status_code=400, detail="Invalid source, subject or filename")
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        return os.path.join(self.files_dir, subject, source, today, filename)
+
+    def _relative_url(self, path: str) -> str:
+        return "/datasets/" + os.path.relpath(path, self.files_dir).replace(os.sep, "/")
+
+    def _session_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{upload_id}.json")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{upload_id}.part")
+
+    def _link_alias(self, source_path: str, alias_path: str) -> None:
+        os.makedirs(os.path.dirname(alias_path), exist_ok=True)
+        try:
+            try:
+                os.link(source_path, alias_path)
+            except FileExistsError:
+                raise
+            except OSError:
+                # No hard links on this filesystem; "xb" still refuses to overwrite.
+                with open(source_path, "rb") as source, open(alias_path, "xb") as target:
+                    shutil.copyfileobj(source, target)
+        except FileExistsError:
+            raise HTTPException(status_code=409, detail="Dataset file already exists")
+
+    def _finalize(self, staged_path: str, digest: str, alias_path: str) -> Dict[str, Any]:
+        object_path = os.path.join(self.objects_dir, digest[:2], digest)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        deduplicated = os.path.exists(object_path)
+        # The alias is created before the staged file is consumed, so a
+        # conflict leaves the upload intact and the commit can be retried.
+        self._link_alias(object_path if deduplicated else staged_path, alias_path)
+        if deduplicated:
+            os.remove(staged_path)
+        else:
+            os.replace(staged_path, object_path)
+
+        return {
+            "fileUrl": self._relative_url(alias_path),
+            "fileSize": os.path.getsize(object_path),
+            "sha256": digest,
+            "deduplicated": deduplicated,
+        }
+
+    async def save_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        source: str,
+        subject: str,
+        filename: str,
+        size_limit: int,
+    ) -> Dict[str, Any]:
+        alias_path = self._alias_path(source, subject, filename)
+        if os.path.exists(alias_path):
+            raise HTTPException(status_code=409, detail="Dataset file already exists")
+
+        staged_path = self._part_path(str(uuid4()))
+        hasher = hashlib.sha256()
+        written = 0
+        handle = await run_in_threadpool(open, staged_path, "wb")
+        try:
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > size_limit:
+                    raise HTTPException(status_code=413, detail="File too large")
+                await run_in_threadpool(_write_chunk, handle, hasher, chunk)
+            await run_in_threadpool(handle.close)
+            return await run_in_threadpool(self._finalize, staged_path, hasher.hexdigest(), alias_path)
+        finally:
+            handle.close()
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+    def _load_session(self, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._session_path(upload_id), "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (FileNotFoundError, ValueError):
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+    def _save_session(self, session: Dict[str, Any]) -> None:
+        path = self._session_path(session["uploadId"])
+        with open(f"{path}.tmp", "w", encoding="utf-8") as handle:
+            json.dump(session, handle)
+        os.replace(f"{path}.tmp", path)
+
+    def _purge_stale(self) -> None:
+        cutoff = time.time() - SESSION_TTL_SECONDS
+        for name in os.listdir(self.staging_dir):
+            path = os.path.join(self.staging_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+
+    def _init_session(self, session: Dict[str, Any]) -> None:
+        self._purge_stale()
+        open(self._part_path(session["uploadId"]), "wb").close()
+        self._save_session(session)
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        lock = self._locks.get(upload_id)
+        if lock is None:
+            lock = self._locks[upload_id] = asyncio.Lock()
+        return lock
+
+    def _discard(self, upload_id: str) -> None:
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+        for path in (self._session_path(upload_id), self._part_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def create_session(
+        self,
+        source: str,
+        subject: str,
+        filename: str,
+        size: Optional[int],
+        size_limit: int,
+    ) -> Dict[str, Any]:
+        if size is not None and size > size_limit:
+            raise HTTPException(status_code=413, detail="File too large")
+        if os.path.exists(self._alias_path(source, subject, filename)):
+            raise HTTPException(status_code=409, detail="Dataset file already exists")
+
+        upload_id = str(uuid4())
+        session = {
+            "uploadId": upload_id,
+            "source": source,
+            "subject": subject,
+            "filename": filename,
+            "size": size,
+            "sizeLimit": size_limit,
+            "offset": 0,
+            "createdAt": datetime.utcnow().isoformat() + "Z",
+        }
+        await run_in_threadpool(self._init_session, session)
+        self._hashers[upload_id] = hashlib.sha256()
+        return session
+
+    async def get_session(self, upload_id: str) -> Dict[str, Any]:
+        return await run_in_threadpool(self._load_session, upload_id)
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        async with self._lock(upload_id):
+            session = await run_in_threadpool(self._load_session, upload_id)
+            if offset != session["offset"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Offset mismatch: upload is at byte {session['offset']}",
+                )
+
+            hasher = self._hashers.get(upload_id)
+            if hasher is None or offset == 0:
+                # Hash state does not survive a restart; it is rebuilt at commit.
+                hasher = None if offset else hashlib.sha256()
+
+            part_path = self._part_path(upload_id)
+            handle = await run_in_threadpool(open, part_path, "r+b")
+            written = 0
+            try:
+                await run_in_threadpool(handle.seek, offset)
+                await run_in_threadpool(handle.truncate)
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if offset + written > session["sizeLimit"]:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    if hasher is None:
+                        await run_in_threadpool(_write_only, handle, chunk)
+                    else:
+                        await run_in_threadpool(_write_chunk, handle, hasher, chunk)
+            finally:
+                # Whatever reached the disk before a dropped connection counts.
+                await run_in_threadpool(handle.flush)
+                written = await run_in_threadpool(handle.tell) - offset
+                await run_in_threadpool(handle.close)
+                session["offset"] = offset + written
+                await run_in_threadpool(self._save_session, session)
+                if hasher is None:
+                    self._hashers.pop(upload_id, None)
+                else:
+                    self._hashers[upload_id] = hasher
+            return session
+
+    async def commit(self, upload_id: str, expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+        async with self._lock(upload_id):
+            session = await run_in_threadpool(self._load_session, upload_id)
+            if session["size"] is not None and session["offset"] != session["size"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {session['offset']} of {session['size']} bytes received",
+                )
+
+            part_path = self._part_path(upload_id)
+            hasher = self._hashers.get(upload_id)
+            if hasher is None:
+                hasher = await run_in_threadpool(_hash_file, part_path)
+            digest = hasher.hexdigest()
+            if expected_sha256 and expected_sha256.lower() != digest:
+                raise HTTPException(status_code=422, detail="Checksum mismatch")
+
+            alias_path = self._alias_path(session["source"], session["subject"], session["filename"])
+            result = await run_in_threadpool(self._finalize, part_path, digest, alias_path)
+            await run_in_threadpool(self._discard, upload_id)
+            return result
+
+    async def abort(self, upload_id: str) -> None:
+        async with self._lock(upload_id):
+            await run_in_threadpool(self._load_session, upload_id)
+            await run_in_threadpool(self._discard, upload_id)